@@ -0,0 +1,125 @@
+from nudetect import fit_gaussians
+
+import numpy as np
+from astropy.modeling import fitting
+
+
+def make_spectra(num_fits=50, seed=0):
+    '''
+    Returns Poisson noise spectra like those fit by 'Noise', binned from 
+    -1000 to 1000 channels, along with their true parameters.
+    '''
+    rng = np.random.default_rng(seed)
+    channels = np.arange(-1000, 999)
+    params = np.column_stack([rng.uniform(20, 200, num_fits), 
+        rng.normal(0, 20, num_fits), rng.uniform(40, 120, num_fits)])
+    spectra = rng.poisson(params[:, 0, np.newaxis] * np.exp(-0.5 * np.square(
+        (channels - params[:, 1, np.newaxis]) / params[:, 2, np.newaxis])))
+
+    return channels, spectra, params
+
+
+def test_fit_gaussians():
+    channels, spectra, true_params = make_spectra()
+    # An empty spectrum can't be fit.
+    spectra[0] = 0
+
+    results = {method: fit_gaussians(channels, spectra, 
+        np.max(spectra, axis=1), 0, 75, method=method) 
+        for method in ('levmar', 'batch')}
+
+    for params, cov, converged in results.values():
+        assert not converged[0] and np.all(converged[1:])
+        assert np.all(np.isnan(cov[0]))
+        assert np.allclose(params[1:], true_params[1:], rtol=0.1, atol=3)
+
+    levmar, batch = results['levmar'], results['batch']
+    assert np.allclose(batch[0][1:], levmar[0][1:], rtol=1e-4, atol=1e-3)
+    assert np.allclose(np.diagonal(batch[1][1:], axis1=1, axis2=2), 
+        np.diagonal(levmar[1][1:], axis1=1, axis2=2), rtol=1e-3)
+
+
+def test_fit_gaussians_raised(monkeypatch):
+    channels, spectra, _ = make_spectra(num_fits=3)
+
+    def raise_non_finite(*args, **kwargs):
+        raise fitting.NonFiniteValueError('Objective function has '
+            + 'encountered a non-finite value')
+
+    # A fit that raises has no parameters, rather than its initial guess.
+    monkeypatch.setattr(fitting.LevMarLSQFitter, '__call__', 
+        raise_non_finite)
+    params, cov, converged = fit_gaussians(channels, spectra, 
+        np.max(spectra, axis=1), 0, 75)
+    assert np.all(np.isnan(params)) and np.all(np.isnan(cov))
+    assert not np.any(converged)
+
+
+def test_fit_gaussians_windows():
+    channels, spectra, _ = make_spectra(num_fits=10, seed=1)
+
+    # Each row has its own window of channels around its peak.
+    peaks = np.argmax(spectra, axis=1)
+    windows = peaks[:, np.newaxis] + np.arange(-150, 150)
+    window_spectra = np.take_along_axis(spectra, windows, axis=1)
+
+    results = [fit_gaussians(channels[windows], window_spectra, 
+        window_spectra.max(axis=1), channels[peaks], 75, method=method)
+        for method in ('levmar', 'batch')]
+
+    assert np.all(results[1][2])
+    assert np.allclose(results[1][0], results[0][0], rtol=1e-4)
+
+
+def test_fit_gaussians_singular():
+    # The damped normal equations of a fit to an empty spectrum become 
+    # singular as its amplitude vanishes. That must not change the steps of
+    # the other fits in its batch.
+    x = np.arange(-20, 20)
+    spectra = np.vstack([np.round(100 * np.exp(-0.5 * np.square((x - 3) / 5))),
+        np.zeros(x.size)])
+    amplitude = np.array([100, 2.36])
+    mean = np.array([-10, 2.76])
+    stddev = np.array([1, 0.33])
+
+    together = fit_gaussians(x, spectra, amplitude, mean, stddev, 
+        method='batch')
+    alone = fit_gaussians(x, spectra[:1], amplitude[:1], mean[:1], 
+        stddev[:1], method='batch')
+
+    assert together[2][0] and alone[2][0]
+    assert np.array_equal(together[0][0], alone[0][0])
+    assert np.array_equal(together[1][0], alone[1][0])
+
+
+def test_fit_gaussians_parallel():
+    channels, spectra, _ = make_spectra(num_fits=20, seed=2)
+
+    for method in ('levmar', 'batch'):
+        serial = fit_gaussians(channels, spectra, np.max(spectra, axis=1), 
+            0, 75, method=method)
+        parallel = fit_gaussians(channels, spectra, np.max(spectra, axis=1),
+            0, 75, method=method, n_jobs=2)
+
+        for a, b in zip(serial, parallel):
+            assert np.array_equal(a, b, equal_nan=True)
+
+
+def test_fit_gaussians_closed_form():
+    channels, spectra, true_params = make_spectra(seed=3)
+    levmar = fit_gaussians(channels, spectra, np.max(spectra, axis=1), 0, 
+        75)
+
+    for method in ('moments', 'log-parabola'):
+        params, cov, converged = fit_gaussians(channels, spectra, 
+            np.max(spectra, axis=1), 0, 75, method=method)
+
+        assert np.all(converged) and np.all(np.isfinite(cov))
+        assert np.allclose(params[:, 1], levmar[0][:, 1], atol=2)
+        assert np.allclose(params[:, [0, 2]], levmar[0][:, [0, 2]], 
+            rtol=0.05)
+
+        # An empty spectrum can't be estimated.
+        params, cov, converged = fit_gaussians(channels, 
+            np.zeros_like(spectra[:2]), 1, 0, 75, method=method)
+        assert not np.any(converged) and np.all(np.isnan(cov))
@@ -0,0 +1,234 @@
+from nudetect import fits_to_df, find_row_window, iter_fits_chunks, \
+    fits_cache_path, EventTable, PixelIndex, PixelHistograms
+
+import os
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+
+def write_events(path, num_events=1000, cold_rows=100, warm_rows=50, seed=0):
+    '''
+    Writes a small FITS file of fake noise events. The first 'cold_rows' and
+    last 'warm_rows' rows are recorded below the default temperature 
+    threshold, and a few rows in between come from detector position 1.
+    '''
+    rng = np.random.default_rng(seed)
+
+    temp = np.full(num_events, -5.0)
+    temp[:cold_rows] = -30.0
+    temp[num_events - warm_rows:] = -25.0
+
+    det_id = np.zeros(num_events, dtype=np.uint8)
+    det_id[cold_rows + 10:cold_rows + 20] = 1
+
+    cols = [
+        fits.Column('TEMP', 'E', array=temp),
+        fits.Column('DET_ID', 'B', array=det_id),
+        fits.Column('RAWX', 'I', array=rng.integers(0, 32, num_events)),
+        fits.Column('RAWY', 'I', array=rng.integers(0, 32, num_events)),
+        fits.Column('PH_RAW', '9I', 
+            array=rng.normal(0, 30, (num_events, 9)).astype(np.int16)),
+        fits.Column('UP', 'L', array=rng.random(num_events) < 0.9),
+        fits.Column('S_CAP', 'B', array=rng.integers(0, 16, num_events)),
+    ]
+    fits.BinTableHDU.from_columns(cols).writeto(path)
+    return fits.getdata(path)
+
+
+def test_fits_to_df_trimming(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    table = write_events(path)
+
+    one_dim_df, two_dim_dfs = fits_to_df(path, {'RAWX', 'PH_RAW'}, pos=0)
+
+    # Rows outside the temperature window are dropped, and 'TEMP' and
+    # 'DET_ID' are only used for trimming.
+    assert list(one_dim_df.columns) == ['RAWX']
+    assert len(one_dim_df) == 1000 - 100 - 50
+    assert np.array_equal(one_dim_df['RAWX'], table['RAWX'][100:950])
+    assert np.array_equal(two_dim_dfs['PH_RAW'].values, 
+        table['PH_RAW'][100:950])
+    assert two_dim_dfs['PH_RAW'].values.dtype.isnative
+
+
+def test_fits_to_df_memmap(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    write_events(path)
+
+    colnames = {'RAWX', 'RAWY', 'UP', 'S_CAP', 'PH_RAW'}
+    mapped = fits_to_df(path, colnames, pos=0, memmap=True)
+    loaded = fits_to_df(path, colnames, pos=0, memmap=False)
+
+    assert mapped[0].equals(loaded[0])
+    assert mapped[1]['PH_RAW'].equals(loaded[1]['PH_RAW'])
+
+
+def test_find_row_window(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    table = write_events(path, cold_rows=130, warm_rows=70)
+
+    # Brute force version of the window, scanning every row.
+    mask = (table['TEMP'] > -20) & (table['DET_ID'] == 0)
+    good = np.nonzero(mask)[0]
+
+    # Small blocks so that the scan crosses block boundaries.
+    for block_size in (1, 7, 64, 5000):
+        assert find_row_window(table, 0, -20, block_size) == \
+            (good[0], good[-1] + 1)
+
+    # Position 1 only appears in 10 rows.
+    assert find_row_window(table, pos=1, block_size=16) == (140, 150)
+    # Nothing is good, so nothing is trimmed.
+    assert find_row_window(table, temp_threshold=100) == (0, 1000)
+    assert find_row_window(table, None, None) == (0, 1000)
+
+
+def test_iter_fits_chunks(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    write_events(path)
+
+    colnames = {'RAWX', 'UP', 'PH_RAW'}
+    one_dim_df, two_dim_dfs = fits_to_df(path, colnames, pos=0)
+    chunks = list(iter_fits_chunks(path, colnames, pos=0, chunk_size=300))
+
+    assert [len(chunk['RAWX']) for chunk in chunks] == [300, 300, 250]
+    assert np.array_equal(np.concatenate([c['RAWX'] for c in chunks]),
+        one_dim_df['RAWX'])
+    assert np.array_equal(np.concatenate([c['UP'] for c in chunks]),
+        one_dim_df['UP'])
+    assert np.array_equal(np.concatenate([c['PH_RAW'] for c in chunks]),
+        two_dim_dfs['PH_RAW'].values)
+
+
+def test_fits_to_df_cache(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    write_events(path)
+    cache_dir = str(tmp_path / 'cache')
+
+    colnames = {'RAWX', 'UP', 'PH_RAW'}
+    loaded = fits_to_df(path, colnames, pos=0)
+    first = fits_to_df(path, colnames, pos=0, cache_dir=cache_dir)
+    cache_path = fits_cache_path(path, cache_dir, pos=0)
+    assert sorted(os.listdir(cache_path)) == \
+        ['PH_RAW.npy', 'RAWX.npy', 'UP.npy', 'columns.txt']
+
+    # The second call is served from the cache.
+    cached = fits_to_df(path, colnames, pos=0, cache_dir=cache_dir)
+    for one_dim_df, two_dim_dfs in (first, cached):
+        assert one_dim_df.equals(loaded[0])
+        assert two_dim_dfs['PH_RAW'].equals(loaded[1]['PH_RAW'])
+
+    # Columns that have not been cached are decoded from the file.
+    one_dim_df, _ = fits_to_df(path, {'RAWY'}, pos=0, cache_dir=cache_dir)
+    assert np.array_equal(one_dim_df['RAWY'], 
+        fits_to_df(path, {'RAWY'}, pos=0)[0]['RAWY'])
+
+    # Different trimming parameters or a modified file miss the cache.
+    assert fits_cache_path(path, cache_dir, pos=1) != cache_path
+    write_events(path + '.new', seed=1)
+    os.replace(path + '.new', path)
+    assert fits_cache_path(path, cache_dir, pos=0) != cache_path
+    one_dim_df, _ = fits_to_df(path, colnames, pos=0, cache_dir=cache_dir)
+    assert one_dim_df.equals(fits_to_df(path, colnames, pos=0)[0])
+
+
+def test_fits_to_df_cache_unwritable(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    write_events(path)
+    # The cache directory can't be created inside a file.
+    cache_dir = path + '/cache'
+
+    with pytest.warns(UserWarning, match='could not be cached'):
+        one_dim_df, _ = fits_to_df(path, {'RAWX'}, pos=0, 
+            cache_dir=cache_dir)
+    assert one_dim_df.equals(fits_to_df(path, {'RAWX'}, pos=0)[0])
+
+
+def test_fits_to_df_vector_format(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    table = write_events(path)
+
+    _, dfs = fits_to_df(path, {'PH_RAW'}, pos=0)
+    _, arrays = fits_to_df(path, {'PH_RAW'}, pos=0, vector_format='numpy')
+
+    ph_raw = arrays['PH_RAW']
+    assert isinstance(ph_raw, np.ndarray)
+    assert ph_raw.dtype.isnative and ph_raw.shape == (850, 9)
+    assert np.array_equal(ph_raw, dfs['PH_RAW'].values)
+    assert np.array_equal(ph_raw, table['PH_RAW'][100:950])
+
+    # Without swapping, the column is left in the FITS byte order.
+    _, arrays = fits_to_df(path, {'PH_RAW'}, pos=0, swap_byte_order=False,
+        vector_format='numpy')
+    assert not arrays['PH_RAW'].dtype.isnative
+    assert np.array_equal(arrays['PH_RAW'], ph_raw)
+
+
+def test_event_table(tmp_path):
+    path = str(tmp_path / 'events.fits')
+    write_events(path)
+    one_dim_df, arrays = fits_to_df(path, 'all', vector_format='numpy')
+
+    columns = {colname: one_dim_df[colname].values 
+        for colname in one_dim_df}
+    columns.update(arrays)
+    columns['TEMP'] = columns['TEMP'] * 100
+    columns['BIG'] = np.arange(len(one_dim_df)) * 1000
+    events = EventTable(columns)
+
+    assert list(events) == list(columns)
+    assert len(events) == len(one_dim_df)
+    for colname, col in columns.items():
+        assert np.array_equal(events[colname], col)
+
+    assert events['RAWX'].dtype == np.uint8
+    assert events['PH_RAW'].dtype == np.int16
+    assert events['UP'].dtype == bool
+    # Values that don't fit the compact dtype are kept as they are.
+    assert events['BIG'].dtype == columns['BIG'].dtype
+    assert events.nbytes < sum(col.nbytes for col in columns.values())
+
+
+def test_pixel_index():
+    rng = np.random.default_rng(0)
+    rawx = rng.integers(-1, 33, 5000)
+    rawy = rng.integers(0, 32, 5000)
+    s_cap = rng.integers(0, 16, 5000)
+
+    index = PixelIndex(rawx, rawy)
+    cap_index = PixelIndex(rawx, rawy, s_cap)
+    for row, col in [(0, 0), (5, 31), (31, 7), (20, 20)]:
+        pixel = np.nonzero((rawx == col) & (rawy == row))[0]
+        assert np.array_equal(index.events(row, col), pixel)
+        assert np.array_equal(np.sort(cap_index.events(row, col)), pixel)
+        for start_cap in (0, 3, 15):
+            assert np.array_equal(cap_index.events(row, col, start_cap),
+                pixel[s_cap[pixel] == start_cap])
+
+    # Events off of the detector are not indexed.
+    assert index.offsets[-1, -1, -1] == np.sum((rawx >= 0) & (rawx < 32))
+
+
+def test_pixel_histograms():
+    rng = np.random.default_rng(3)
+    cells = rng.integers(0, 12, 5000)
+    channels = rng.normal(0, 40, 5000).round()
+
+    expected = np.stack([np.histogram(channels[cells == cell], 
+        bins=np.arange(-100, 101))[0] for cell in range(12)])
+
+    for sparse in (False, True):
+        # Accumulating in two halves and merging them gives the same
+        # histograms as binning all of the events at once.
+        first = PixelHistograms((3, 4), -100, 100, sparse=sparse)
+        second = PixelHistograms((3, 4), -100, 100, sparse=not sparse)
+        first.add(cells[:2000], channels[:2000])
+        second.add(cells[2000:], channels[2000:])
+        first += second
+
+        assert np.array_equal(first.counts.ravel(), np.bincount(cells))
+        assert np.array_equal(first.spectra().reshape(12, -1), expected)
+        assert np.array_equal(first.spectra(([2, 0], [1, 3])), 
+            expected[[9, 3]])
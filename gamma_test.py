@@ -0,0 +1,306 @@
+from nudetect import EnergySpectrum, EventTable, GammaFlood, Source, \
+    interpolate_empty, _energy_block
+
+import numpy as np
+import pandas as pd
+import pytest
+from astropy.io import fits
+
+
+def write_flood(path, num_events=20000, seed=0):
+    '''
+    Writes a FITS file of fake Am241 gamma flood events, with the 59.5 keV
+    line at a gain of about 0.014 keV per channel.
+    '''
+    rng = np.random.default_rng(seed)
+
+    rawx = rng.integers(0, 32, num_events)
+    rawy = rng.integers(0, 32, num_events)
+    gain = 0.014 * (1 + 0.05 * rng.standard_normal((32, 32)))
+
+    ph = (59.5409 / gain[rawy, rawx] + rng.normal(0, 40, num_events))
+    ph_com = rng.normal(0, 30, (num_events, 9))
+    ph_com[:, 4] = ph
+
+    cols = [
+        fits.Column('TEMP', 'E', array=np.full(num_events, -5.0)),
+        fits.Column('RAWX', 'I', array=rawx),
+        fits.Column('RAWY', 'I', array=rawy),
+        fits.Column('PH', 'J', array=ph.astype(np.int32)),
+        fits.Column('PH_COM', '9J', array=ph_com.astype(np.int32)),
+        fits.Column('STIM', 'B', array=rng.random(num_events) < 0.05),
+    ]
+    fits.BinTableHDU.from_columns(cols).writeto(path)
+
+
+def make_gamma(tmp_path):
+    path = str(tmp_path / 'gamma.fits')
+    write_flood(path)
+    gamma = GammaFlood(path, 'H100', Source('Am241'), voltage=0, temp=5)
+    gamma.cache_dir = str(tmp_path / 'cache')
+    return gamma
+
+
+def test_streaming_gamma(tmp_path):
+    gamma = make_gamma(tmp_path)
+    gamma.select_detector_region(10, 12, 16, 15)
+    gamma.load_raw_data()
+
+    count_map = gamma.gen_count_map(save_data=False)
+    gain = gamma.gen_quick_gain(save_plot=False, save_data=False)
+    spectrum = gamma.gen_spectrum(save_data=False)
+
+    assert np.array_equal(
+        gamma.gen_count_map(save_data=False, chunk_size=3000), count_map)
+    assert np.allclose(gamma.gen_quick_gain(save_plot=False, 
+        save_data=False, chunk_size=3000), gain)
+    assert np.array_equal(
+        gamma.gen_spectrum(save_data=False, chunk_size=3000), spectrum)
+
+
+def test_compact_gamma(tmp_path):
+    gamma = make_gamma(tmp_path)
+    gamma.select_detector_region(10, 12, 16, 15)
+    gamma.load_raw_data()
+    gain = np.full(gamma._det_shape, 0.014)
+    count_map = gamma.gen_count_map(save_data=False)
+    spectrum = gamma.gen_spectrum(save_data=False, gain=gain)
+
+    gamma.load_raw_data(compact=True)
+    assert gamma.raw_data_1d is gamma.raw_data_2d
+    assert np.array_equal(gamma.gen_count_map(save_data=False), count_map)
+    assert np.array_equal(gamma.gen_spectrum(save_data=False, gain=gain), 
+        spectrum)
+
+    # Vector columns default to DataFrames, and numpy arrays give the same
+    # results.
+    assert isinstance(gamma.raw_data_2d, EventTable)
+    gamma.load_raw_data()
+    assert isinstance(gamma.raw_data_2d['PH_COM'], pd.DataFrame)
+    gamma.load_raw_data(vector_format='numpy')
+    assert isinstance(gamma.raw_data_2d['PH_COM'], np.ndarray)
+    assert np.array_equal(gamma.gen_count_map(save_data=False), count_map)
+    assert np.array_equal(gamma.gen_spectrum(save_data=False, gain=gain), 
+        spectrum)
+
+
+def test_energy_spectrum(tmp_path):
+    gamma = make_gamma(tmp_path)
+    gamma.load_raw_data()
+    gain = np.full(gamma._det_shape, 0.014)
+    spectrum = gamma.gen_spectrum(save_data=False, gain=gain, bins=500)
+
+    energies = np.random.default_rng(1).uniform(0, 130, 5000)
+    first, second = EnergySpectrum(500), EnergySpectrum(500)
+    first.add(energies[:2000])
+    second.add(energies[2000:])
+    first += second
+    expected = np.histogram(energies, bins=500, range=(0.01, 120))[0]
+    assert np.array_equal(first.counts, expected)
+
+    # Fixed bins need a fixed range.
+    with pytest.raises(ValueError):
+        EnergySpectrum(500, energy_range=None)
+    with pytest.raises(ValueError):
+        gamma.gen_spectrum(save_data=False, gain=gain, energy_range=None)
+    edges = np.linspace(0.01, 120, 501)
+    assert np.array_equal(EnergySpectrum(edges, energy_range=None).edges, 
+        edges)
+
+    # Adding to a spectrum that already holds events
+    total = gamma.gen_spectrum(save_data=False, gain=gain, 
+        energy_spectrum=first)
+    assert gamma.energy_spectrum is first
+    assert np.array_equal(total[0], spectrum[0] + expected)
+    assert np.array_equal(total[1], spectrum[1])
+
+    with pytest.raises(ValueError):
+        first.merge(EnergySpectrum(400))
+
+
+def test_rebin_spectrum(tmp_path):
+    energies = np.random.default_rng(2).uniform(0, 130, 20000)
+    fine = EnergySpectrum(12000, (0, 120))
+    fine.add(energies)
+
+    for bins, energy_range in ((100, None), (300, (30, 60)), 
+        ([0, 0.5, 2, 59.99, 120], None)):
+        coarse = fine.rebin(bins, energy_range)
+        expected = np.histogram(energies, bins=bins, 
+            range=energy_range or (0, 120))
+        assert np.array_equal(coarse.counts, expected[0])
+        assert np.array_equal(coarse.edges, expected[1])
+
+    # Edges that cut through bins can't be rebinned exactly
+    for bins, energy_range in ((7, None), (100, (-10, 110))):
+        with pytest.raises(ValueError):
+            fine.rebin(bins, energy_range)
+
+    gamma = make_gamma(tmp_path)
+    gamma.load_raw_data()
+    gamma.gain = np.full(gamma._det_shape, 0.014)
+    spectrum = gamma.gen_spectrum(save_data=False, bins=500)
+    assert np.array_equal(gamma.gen_spectrum(save_data=False, bins=500, 
+        fine_bins=20000), spectrum)
+    assert gamma.energy_spectrum.counts.size == 20000
+    assert np.array_equal(gamma.rebin_spectrum(500, (0.01, 120)), spectrum)
+
+    # Bins that don't line up with the fine bins are refused before any 
+    # events are binned, leaving the master histogram alone.
+    def fold_raw_data(*args, **kwargs):
+        raise AssertionError('The raw data should not be read.')
+    gamma._fold_raw_data = fold_raw_data
+    master = gamma.energy_spectrum
+    with pytest.raises(ValueError):
+        gamma.gen_spectrum(save_data=False, bins=7, fine_bins=20000)
+    assert gamma.energy_spectrum is master
+
+
+def test_energies(tmp_path):
+    gamma = make_gamma(tmp_path)
+    gamma.select_detector_region(10, 12, 16, 15)
+    gamma.load_raw_data()
+    gamma.gain = np.full(gamma._det_shape, 0.014)
+    spectrum = gamma.gen_spectrum(save_data=False)
+
+    energies = gamma.gen_energies(save_path=str(tmp_path / 'energies.npy'))
+    assert isinstance(energies, np.memmap) and energies.dtype == np.float32
+    assert np.allclose(energies, np.concatenate([_energy_block(block, 
+        gamma._region(), gamma._buffer_gain(gamma.gain)) for block in 
+        gamma._raw_data_blocks({'RAWX', 'RAWY', 'PH_COM'})]), rtol=1e-6)
+
+    # Rebinning the stored energies, and recomputing them only once the 
+    # gain changes
+    binned = gamma.gen_spectrum(save_data=False, from_energies=True)
+    assert gamma.energies is energies
+    assert binned[0].sum() == spectrum[0].sum()
+    assert np.abs(binned[0] - spectrum[0]).sum() <= 2
+    coarse = gamma.gen_spectrum(save_data=False, bins=100, 
+        from_energies=True)
+    assert gamma.energies is energies
+    assert coarse[0].sum() == spectrum[0].sum()
+
+    gamma.gain = gamma.gain * 1.1
+    gamma.gen_spectrum(save_data=False, from_energies=True)
+    assert gamma.energies is not energies
+    assert np.allclose(gamma.energies, energies * 1.1, rtol=1e-5)
+
+    # The energies are saved to the path as given, without an extension.
+    saved = gamma.gen_energies(save_path=str(tmp_path / 'energies'))
+    assert isinstance(saved, np.memmap)
+    assert np.allclose(saved, energies * 1.1, rtol=1e-5)
+
+
+def test_energies_reload(tmp_path):
+    gamma = make_gamma(tmp_path)
+    gamma.load_raw_data()
+    gamma.gain = np.full(gamma._det_shape, 0.014)
+    gamma.gen_spectrum(save_data=False, from_energies=True)
+
+    other_path = str(tmp_path / 'other.fits')
+    write_flood(other_path, num_events=9000, seed=1)
+    other = GammaFlood(other_path, 'H100', Source('Am241'), voltage=0, 
+        temp=5)
+    other.load_raw_data()
+    expected = other.gen_spectrum(gain=gamma.gain, save_data=False)
+
+    # Energies of the previous file are recomputed from the new one.
+    gamma.raw_data_path = other_path
+    gamma.raw_data_paths = [other_path]
+    gamma.load_raw_data()
+    assert gamma.energies is None
+    spectrum = gamma.gen_spectrum(save_data=False, from_energies=True)
+    assert spectrum[0].sum() == expected[0].sum()
+    assert gamma.energies.size == 9000
+
+    # So are they if the files change without reloading.
+    gamma.raw_data_paths = [gamma.raw_data_paths[0], other_path]
+    assert not gamma._energies_match(gamma.gain)
+
+
+def test_multiple_files(tmp_path):
+    paths = [str(tmp_path / f'gamma{seed}.fits') for seed in range(2)]
+    for seed, path in enumerate(paths):
+        write_flood(path, num_events=8000, seed=seed)
+
+    # The same events, written to a single file
+    tables = [fits.getdata(path) for path in paths]
+    hdu = fits.BinTableHDU.from_columns(tables[0].columns, 
+        nrows=sum(len(table) for table in tables))
+    for colname in tables[0].names:
+        hdu.data[colname] = np.concatenate([table[colname] 
+            for table in tables])
+    hdu.writeto(tmp_path / 'joined.fits')
+
+    joined = GammaFlood(str(tmp_path / 'joined.fits'), 'H100', 
+        Source('Am241'), voltage=0, temp=5)
+    joined.load_raw_data(cache=False)
+    count_map = joined.gen_count_map(save_data=False)
+    gain = joined.gen_quick_gain(save_plot=False, save_data=False,
+        fit_method='batch')
+    spectrum = joined.gen_spectrum(save_data=False)
+
+    gamma = GammaFlood(paths, 'H100', Source('Am241'), voltage=0, temp=5)
+    assert gamma.raw_data_path == paths[0]
+    with pytest.raises(ValueError):
+        gamma.load_raw_data()
+
+    for n_jobs in (1, 2):
+        assert np.array_equal(gamma.gen_count_map(save_data=False, 
+            n_jobs=n_jobs), count_map)
+        assert np.allclose(gamma.gen_quick_gain(save_plot=False, 
+            save_data=False, fit_method='batch', n_jobs=n_jobs), gain)
+        assert np.array_equal(gamma.gen_spectrum(save_data=False, 
+            chunk_size=3000, n_jobs=n_jobs), spectrum)
+
+
+def test_count_map(tmp_path):
+    gamma = make_gamma(tmp_path)
+    gamma.select_detector_region(10, 12, 16, 15)
+    gamma.load_raw_data()
+    table = fits.getdata(gamma.raw_data_path)
+
+    for mask_STIM in (True, False):
+        count_map = gamma.gen_count_map(save_data=False, 
+            mask_STIM=mask_STIM)
+        for row in range(12, 15):
+            for col in range(10, 16):
+                mask = (table['RAWX'] == col) & (table['RAWY'] == row)
+                if mask_STIM:
+                    mask &= table['STIM'] == 0
+                assert count_map[row - 12, col - 10] == np.sum(mask)
+
+
+def test_quick_gain(tmp_path):
+    gamma = make_gamma(tmp_path)
+    gamma.select_detector_region(10, 12, 16, 15)
+    gamma.load_raw_data()
+
+    gain = gamma.gen_quick_gain(save_plot=False, save_data=False)
+    assert np.all(np.abs(gain / 0.014 - 1) < 0.2)
+
+    batch_gain = gamma.gen_quick_gain(save_plot=False, save_data=False, 
+        fit_method='batch')
+    assert np.allclose(batch_gain, gain, rtol=1e-4)
+
+
+def test_interpolate_empty():
+    rng = np.random.default_rng(6)
+    gain = rng.uniform(0.013, 0.015, (48, 64))
+    gain[rng.random(gain.shape) < 0.3] = 0
+    # A hole too big to fill in 3 rounds
+    gain[10:18, 20:30] = 0
+
+    # Filling one pixel at a time from the gains at the start of each round
+    expected = gain.copy()
+    for _ in range(3):
+        padded = np.pad(expected, 1)
+        for row, col in zip(*np.nonzero(expected == 0)):
+            grid = padded[row:row + 3, col:col + 3]
+            if np.count_nonzero(grid):
+                expected[row, col] = grid.sum() / np.count_nonzero(grid)
+
+    filled = interpolate_empty(gain, iterations=3)
+    assert np.allclose(filled, expected, rtol=1e-12)
+    assert np.all(filled[13:15, 23:27] == 0)
+    assert np.count_nonzero(filled == 0) == 8
@@ -0,0 +1,220 @@
+from nudetect import Noise, PixelHistograms
+from fits_test import write_events
+
+import numpy as np
+import pytest
+
+
+def make_noise(tmp_path):
+    path = str(tmp_path / 'noise.fits')
+    write_events(path, num_events=5000)
+    noise = Noise(path, 'H100', voltage=0, temp=5)
+    noise.cache_dir = str(tmp_path / 'cache')
+    # A small region keeps the number of fits down.
+    noise.select_detector_region(3, 4, 7, 7)
+    return noise
+
+
+def test_streaming_noise(tmp_path):
+    noise = make_noise(tmp_path)
+    noise.load_raw_data()
+
+    quick = noise.gen_quick_noise(save_plot=False, save_data=False)
+    fwhm_map, count_map = noise.get_fwhm_map(), noise.count_map
+    noise.gen_full_noise(save_data=False)
+    mean_maps, count_maps = noise._mean_maps, noise.count_maps
+
+    # Dropping the stored spectra, so they are accumulated again from the
+    # FITS file in chunks.
+    noise.cap_spectra = None
+    streamed_quick = noise.gen_quick_noise(save_plot=False, save_data=False,
+        chunk_size=1000)
+    assert np.array_equal(noise.count_map, count_map)
+    assert np.allclose(noise.get_fwhm_map(), fwhm_map, equal_nan=True)
+    assert np.allclose(streamed_quick, quick, equal_nan=True)
+
+    noise.cap_spectra = None
+    noise.gen_full_noise(save_data=False, chunk_size=1000)
+    assert np.array_equal(noise.count_maps, count_maps)
+    assert np.allclose(noise._mean_maps, mean_maps, equal_nan=True)
+
+
+def test_quick_noise_counts(tmp_path):
+    noise = make_noise(tmp_path)
+    noise.load_raw_data()
+    noise.gen_quick_noise(save_plot=False, save_data=False)
+
+    # Each micropulse-triggered event adds a reading to the 9 pixels 
+    # around it, if they are in the region (rows 4 to 6, columns 3 to 6).
+    table = noise.raw_data_1d
+    up = table['UP'].values
+    count_map = np.zeros((3, 4), dtype=int)
+    for rawx, rawy in zip(table['RAWX'][up], table['RAWY'][up]):
+        if 4 <= rawy < 7 and 3 <= rawx < 7:
+            for row in range(rawy - 1, rawy + 2):
+                for col in range(rawx - 1, rawx + 2):
+                    if 4 <= row < 7 and 3 <= col < 7:
+                        count_map[row - 4, col - 3] += 1
+
+    assert np.array_equal(noise.count_map, count_map)
+
+
+def test_noise_spectra_reused(tmp_path):
+    quick_first = make_noise(tmp_path)
+    quick_first.load_raw_data()
+    quick_first.gen_quick_noise(save_plot=False, save_data=False)
+    cap_spectra = quick_first.cap_spectra
+    quick_first.gen_full_noise(save_data=False, warm_start=False)
+    assert quick_first.cap_spectra is cap_spectra
+
+    # Running full noise first on the same events gives the same results.
+    (tmp_path / 'full').mkdir()
+    full_first = make_noise(tmp_path / 'full')
+    full_first.load_raw_data()
+    full_first.gen_full_noise(save_data=False)
+    full_first.gen_quick_noise(save_plot=False, save_data=False)
+
+    assert np.array_equal(full_first.count_map, quick_first.count_map)
+    assert np.array_equal(full_first.count_map, 
+        full_first.count_maps.sum(axis=0))
+    assert np.allclose(full_first.get_fwhm_map(), 
+        quick_first.get_fwhm_map(), equal_nan=True)
+    assert np.allclose(full_first._fwhm_maps, quick_first._fwhm_maps, 
+        equal_nan=True)
+
+    # Selecting another region starts the spectra over.
+    full_first.select_detector_region(0, 0, 4, 4)
+    full_first.gen_quick_noise(save_plot=False, save_data=False)
+    assert full_first.cap_spectra.shape == (16, 4, 4)
+
+    # So do asking for sparse spectra and loading other raw data.
+    full_first.gen_quick_noise(save_plot=False, save_data=False, sparse=True)
+    assert full_first.cap_spectra.sparse
+
+    other_path = str(tmp_path / 'other.fits')
+    write_events(other_path, num_events=5000, seed=1)
+    other = Noise(other_path, 'H100', voltage=0, temp=5)
+    other.select_detector_region(3, 4, 7, 7)
+    other.load_raw_data()
+    other.gen_quick_noise(save_plot=False, save_data=False)
+
+    quick_first.raw_data_path = other_path
+    quick_first.load_raw_data()
+    quick_first.gen_quick_noise(save_plot=False, save_data=False)
+    assert np.array_equal(quick_first.count_map, other.count_map)
+    assert np.allclose(quick_first.get_fwhm_map(), other.get_fwhm_map(), 
+        equal_nan=True)
+
+
+def test_gain_correct_fwhm(tmp_path):
+    gain = np.random.default_rng(4).uniform(0.01, 0.02, (32, 32))
+    gain[5, 4] = 0
+
+    corrected = make_noise(tmp_path)
+    corrected.load_raw_data()
+    corrected.gen_quick_noise(save_plot=False, save_data=False)
+    corrected.gen_full_noise(save_data=False)
+    corrected.gain_correct_fwhm(gain, data_dir=str(tmp_path))
+
+    # Rescaling gives the same maps as fitting with the gain in the first 
+    # place.
+    (tmp_path / 'gain').mkdir()
+    refit = make_noise(tmp_path / 'gain')
+    refit.load_raw_data()
+    refit.gen_quick_noise(gain=gain, save_plot=False, save_data=False)
+    refit.gen_full_noise(gain=gain, save_data=False)
+
+    assert corrected.get_gain_corrected()
+    for attr in ('_fwhm_map', '_mean_map', '_fwhm_maps', '_mean_maps'):
+        assert np.array_equal(np.ma.getdata(getattr(corrected, attr)), 
+            np.ma.getdata(getattr(refit, attr)), equal_nan=True)
+        assert np.array_equal(np.ma.getmaskarray(getattr(corrected, attr)), 
+            np.ma.getmaskarray(getattr(refit, attr)))
+
+    saved = np.loadtxt(corrected.construct_path('data', ext='.txt', 
+        save_dir=str(tmp_path), description='quick_fwhm_data', etc='gain'))
+    assert np.allclose(saved, corrected.get_fwhm_map().data, equal_nan=True)
+
+    # Only the maps still in channels are rescaled when the quick noise was
+    # already generated with the gain.
+    (tmp_path / 'mixed').mkdir()
+    mixed = make_noise(tmp_path / 'mixed')
+    mixed.load_raw_data()
+    mixed.gen_quick_noise(gain=gain, save_plot=False, save_data=False)
+    mixed.gen_full_noise(save_data=False)
+    mixed.gain_correct_fwhm(gain, save_data=False)
+    for attr in ('_fwhm_map', '_mean_map', '_fwhm_maps', '_mean_maps'):
+        assert np.array_equal(np.ma.getdata(getattr(mixed, attr)), 
+            np.ma.getdata(getattr(refit, attr)), equal_nan=True)
+
+    with pytest.raises(ValueError):
+        mixed.gain_correct_fwhm(gain, save_data=False)
+
+
+def test_warm_start_fits():
+    noise = Noise('noise.fits', 'H100', voltage=0, temp=5)
+    noise.select_detector_region(0, 0, 3, 2)
+
+    # High-statistics noise peaks for 2 capacitors of a 2 x 3 region
+    rng = np.random.default_rng(5)
+    shape = (2, 2, 3)
+    means = rng.uniform(-20, 20, shape)
+    stddevs = rng.uniform(20, 40, shape)
+    cells = np.repeat(np.arange(12), 5000)
+    spectra = PixelHistograms(shape, -1000, 999)
+    spectra.add(cells, np.round(rng.normal(means.ravel()[cells], 
+        stddevs.ravel()[cells])))
+
+    def fit(seeds):
+        fwhm_maps = np.full(shape, np.nan)
+        mean_maps = np.full(shape, np.nan)
+        fit_values = np.full((12, 4), np.nan)
+        noise._fit_noise_spectra(spectra, np.ones(shape[1:]), fwhm_maps, 
+            mean_maps, fit_values, seeds=seeds)
+        assert np.array_equal(fit_values[:, 2], fwhm_maps.ravel())
+        return fwhm_maps, mean_maps
+
+    # Seeds that are off by a bit, as from the quick noise fits, give the
+    # same fits within the windows as fits over all channels.
+    cold = fit(None)
+    warm = fit((means.mean(axis=0) + 3, stddevs.mean(axis=0)))
+    assert np.allclose(warm, cold, rtol=1e-2, atol=0.5)
+    assert np.allclose(warm[0], 2.3548 * stddevs, rtol=0.05)
+
+
+def test_warm_start_reload(tmp_path):
+    noise = make_noise(tmp_path)
+    noise.load_raw_data()
+    noise.gen_quick_noise(save_plot=False, save_data=False)
+
+    other_path = str(tmp_path / 'other.fits')
+    write_events(other_path, num_events=5000, seed=1)
+    other = Noise(other_path, 'H100', voltage=0, temp=5)
+    other.select_detector_region(3, 4, 7, 7)
+    other.load_raw_data()
+    other.gen_full_noise(save_plot=False, save_data=False, warm_start=False)
+
+    # The quick fits of the first file don't seed fits of the second.
+    noise.raw_data_path = other_path
+    noise.load_raw_data()
+    noise.gen_full_noise(save_plot=False, save_data=False)
+    assert np.allclose(noise._full_fit_data.values, 
+        other._full_fit_data.values, equal_nan=True)
+
+
+def test_pixel_events(tmp_path):
+    noise = make_noise(tmp_path)
+    noise.load_raw_data()
+    assert noise.pixel_index is None
+    masks = {(row, col, cap): noise.pixel_events(row, col, cap) 
+        for row, col in [(4, 3), (7, 7), (0, 31)] for cap in (None, 0, 9)}
+    ph_raw = np.asarray(noise.raw_data_2d['PH_RAW'])
+    assert len(ph_raw[noise.pixel_events(4, 3)]) == np.sum(
+        (noise.raw_data_1d['RAWX'] == 3) & (noise.raw_data_1d['RAWY'] == 4))
+
+    # The index picks out the same events as scanning for each pixel, 
+    # grouped by starting capacitor.
+    noise.load_raw_data(index=True, compact=True)
+    for (row, col, cap), mask in masks.items():
+        assert np.array_equal(np.sort(noise.pixel_events(row, col, cap)), 
+            np.flatnonzero(mask))
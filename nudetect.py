@@ -14,17 +14,24 @@ methods and attributes shared amongst subclasses.
 '''
 
 # Packages for making life easier
+import os
 import os.path
+import math
 import string
+import hashlib
 import argparse
 import datetime
+import warnings
+import functools
+import itertools
+import concurrent.futures
+from multiprocessing import shared_memory
 
 # Data analysis packages
 import numpy as np
 import pandas as pd
 from astropy.io import fits
 from astropy.modeling import models, fitting
-from astropy.table import Table
 import astropy.io.ascii as asciio
 
 # Plotting packages
@@ -130,9 +137,65 @@ def get_mean_stdv(values, precision, value_label):
 ##
 
 def fits_to_df(filepath, colnames, pos=None, temp_threshold=-20,
-    swap_byte_order=True):
+    swap_byte_order=True, memmap=True, cache_dir=None, 
+    vector_format='dataframe'):
     '''
     Loads and slices out good data from a FITS file of detector test data.
+
+    Arguments:
+        filepath: str
+            The path to the FITS file. Event data is read from the first
+            binary table extension.
+        colnames: str or set of str
+            The names of the columns to load. If None or 'all', every 
+            column in the table is loaded.
+
+    Keyword Arguments:
+        pos: int
+            If not None, only rows between the first and last event from the
+            detector in this position ('DET_ID') are kept.
+            (default: None)
+        temp_threshold: int or float
+            If not None, only rows between the first and last event with a 
+            temperature ('TEMP') above this value are kept.
+            (default: -20)
+        swap_byte_order: bool
+            If True, two dimensional columns are converted from the FITS 
+            (big-endian) byte order to the native byte order. The bytes are
+            swapped in place in the freshly read columns, so this never 
+            makes a second copy. Columns loaded from the cache are already 
+            in the native byte order.
+            (default: True)
+        memmap: bool
+            If True, the FITS file is memory-mapped and only the columns 
+            needed here are ever copied into RAM. If False, the whole table 
+            is read in before the columns are sliced out.
+            (default: True)
+        cache_dir: str
+            If not None, the trimmed columns are cached in a subdirectory of 
+            'cache_dir' as native byte order '.npy' files the first time 
+            they are loaded (see 'fits_cache_path'). Later calls for the 
+            same file, 'pos' and 'temp_threshold' memory-map the cached 
+            columns instead of decoding the FITS file again. The cache is 
+            invalidated if the file's size or modification time changes.
+            If the columns can't be written to the cache (e.g., if 
+            'cache_dir' can't be created), a warning is issued and the 
+            decoded columns are returned anyway.
+            (default: None)
+        vector_format: str
+            If 'dataframe', each two dimensional column is returned as a 
+            pandas.DataFrame. If 'numpy', they are returned as the 
+            underlying numpy arrays of shape (number of events, 9), 
+            without any pandas wrapping.
+            (default: 'dataframe')
+
+    Return:
+        one_dim_df: pandas.DataFrame
+            The requested one dimensional columns, or None if there are none.
+        two_dim_dfs: dict of pandas.DataFrame or numpy.ndarray
+            The requested two dimensional columns (e.g., 'PH_COM'), keyed by 
+            column name, or None if there are none. These are numpy arrays
+            if 'vector_format' is 'numpy'.
     '''
 
     #
@@ -142,97 +205,1631 @@ def fits_to_df(filepath, colnames, pos=None, temp_threshold=-20,
 
     # Call this up here so that if an exception is raised, it's before
     # the time-expensive part of this function.
-    if colnames != 'all':
+    if colnames is not None and colnames != 'all':
         colnames = to_set(colnames)
+    if vector_format not in ('dataframe', 'numpy'):
+        raise ValueError("'vector_format' should be 'dataframe' or 'numpy', "
+            + f"not {vector_format!r}")
+
+    # If the columns have been cached, load them from the cache.
+    columns = None
+    if cache_dir is not None:
+        cache_path = fits_cache_path(filepath, cache_dir, pos, temp_threshold)
+        columns = load_cached_columns(cache_path, colnames)
+
+    if columns is None:
+        with fits.open(filepath, memmap=memmap) as hdul:
+            # The event data is stored in the first binary table extension.
+            hdu = next(h for h in hdul if isinstance(h, fits.BinTableHDU))
+            all_names = hdu.columns.names
+
+            # If 'colnames' was not specified, assign it to the set of 
+            # all column names in the table.
+            if colnames is None or colnames == 'all':
+                colnames = set(all_names)
+
+            # Accessing 'hdu.data' does not read the table when it is 
+            # memory-mapped. Individual columns are only paged in when they 
+            # are copied out below, so columns we don't need never touch RAM.
+            data = hdu.data
+
+            # First pass: find the window of good rows by scanning only the 
+            # cheap 'TEMP' and 'DET_ID' columns.
+            start, end = find_row_window(data, pos, temp_threshold)
+
+            # Second pass: copy the requested columns out of the file, 
+            # reading only the rows in the window and keeping the order in 
+            # which the columns are stored in the table. Any 'TEMP' and 
+            # 'DET_ID' columns that were only used for trimming are left 
+            # behind.
+            window = data[start:end]
+            columns = {}
+            for colname in all_names:
+                if colname in colnames:
+                    col = np.array(window.field(colname))
+                    # 'col' is a fresh copy, so its bytes can be swapped in
+                    # place. Cached columns are stored in native byte order.
+                    if col.ndim == 1 or swap_byte_order \
+                        or cache_dir is not None:
+                        col = native_byte_order(col, inplace=True)
+                    columns[colname] = col
+
+            del window, data
+
+        if cache_dir is not None:
+            try:
+                cache_columns(cache_path, all_names, columns)
+            except OSError as error:
+                warnings.warn(f'The columns of {filepath} could not be '
+                    + f'cached in {cache_path}: {error}')
+
+    #
+    # Convert our data columns to pandas.DataFrames. DataFrames should be 
+    # faster than astropy Tables for indexing/scalar value access.
+    #
+
+    # These dicts will divide columns by their dimensionality. One dimensional
+    # columns (i.e, a column of scalars) can be combined into a single pandas
+    # DataFrame.
+    one_dim_cols = {}
+    two_dim_cols = {}
+
+    for colname, col in columns.items():
+        if col.ndim == 1:
+            one_dim_cols[colname] = col
+        else:
+            two_dim_cols[colname] = col
+    del columns
+
+    # If any one dimensional columns were requested, convert them all to a
+    # single pandas.DataFrame called 'one_dim_df'. These are already in the
+    # native byte order, which pandas needs.
+    if one_dim_cols:
+        one_dim_df = pd.DataFrame(one_dim_cols)
+    else:
+        one_dim_df = None
+
+    # If any two dimensional columns were requested, put them all in a dict,
+    # either as they are or wrapped in one pandas.DataFrame per column.
+    if two_dim_cols:
+        if vector_format == 'numpy':
+            two_dim_dfs = two_dim_cols
+        else:
+            two_dim_dfs = {colname: pd.DataFrame(col) 
+                for colname, col in two_dim_cols.items()}
+    else:
+        two_dim_dfs = None
+
+    return one_dim_df, two_dim_dfs
+
+
+def iter_fits_chunks(filepath, colnames, pos=None, temp_threshold=-20,
+    chunk_size=1000000, memmap=True):
+    '''
+    A generator version of 'fits_to_df'. Rather than loading all of the 
+    good data from a FITS file of detector test data at once, it yields the
+    data in blocks of at most 'chunk_size' events, so that files larger than
+    the available RAM can be processed with constant memory.
+
+    Arguments:
+        filepath: str
+            The path to the FITS file. Event data is read from the first
+            binary table extension.
+        colnames: str or set of str
+            The names of the columns to load. If None or 'all', every 
+            column in the table is loaded.
+
+    Keyword Arguments:
+        pos: int
+            If not None, only rows between the first and last event from the
+            detector in this position ('DET_ID') are yielded.
+            (default: None)
+        temp_threshold: int or float
+            If not None, only rows between the first and last event with a 
+            temperature ('TEMP') above this value are yielded.
+            (default: -20)
+        chunk_size: int
+            The maximum number of events in each block.
+            (default: 1000000)
+        memmap: bool
+            If True, the FITS file is memory-mapped, so only the rows in the
+            current block are read into RAM.
+            (default: True)
+
+    Yields: dict of numpy.ndarray
+        A block of consecutive events, keyed by column name. Every column is
+        in the native byte order. Two dimensional columns (e.g., 'PH_COM')
+        have shape (number of events, 9).
+    '''
+    check_positive(chunk_size=chunk_size)
+
+    if colnames is not None and colnames != 'all':
+        colnames = to_set(colnames)
+
+    with fits.open(filepath, memmap=memmap) as hdul:
+        # The event data is stored in the first binary table extension.
+        hdu = next(h for h in hdul if isinstance(h, fits.BinTableHDU))
+        all_names = hdu.columns.names
+
+        if colnames is None or colnames == 'all':
+            colnames = set(all_names)
+
+        names = [colname for colname in all_names if colname in colnames]
+
+        data = hdu.data
+        start, end = find_row_window(data, pos, temp_threshold)
+
+        for chunk_start in range(start, end, chunk_size):
+            chunk = data[chunk_start:min(chunk_start + chunk_size, end)]
+            yield {colname: native_byte_order(
+                    np.array(chunk.field(colname)), inplace=True)
+                for colname in names}
+
+
+def _fold_fits_chunks(fold, filepath, colnames, chunk_size):
+    '''
+    Returns 'fold' applied to the blocks of events that 'iter_fits_chunks' 
+    yields from the FITS file at 'filepath'. Defined at module level so 
+    that it can run in a worker process (see 'GammaFlood._fold_raw_data').
+    '''
+    return fold(iter_fits_chunks(filepath, colnames, chunk_size=chunk_size))
+
+
+def fits_cache_path(filepath, cache_dir, pos=None, temp_threshold=-20):
+    '''
+    Returns the path to the directory in 'cache_dir' in which 'fits_to_df'
+    caches the columns it loads from the FITS file at 'filepath'. The 
+    directory name is derived from the file's name, absolute path, size and 
+    modification time, along with 'pos' and 'temp_threshold', so a changed
+    file or different trimming parameters never hit stale data.
+    '''
+    stat = os.stat(filepath)
+    key = repr((os.path.realpath(filepath), stat.st_size, stat.st_mtime_ns, 
+        pos, temp_threshold))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    filename = os.path.splitext(os.path.basename(filepath))[0]
+
+    return os.path.join(cache_dir, f'{filename}_{digest}')
+
+
+def cache_columns(cache_path, all_names, columns):
+    '''
+    Saves each array in the dict 'columns' to '[cache_path]/[column].npy',
+    along with the names of all of the columns in the original table (in 
+    order) in '[cache_path]/columns.txt'. Files are written under temporary
+    names and then renamed, so concurrent loads never see partial files.
+    Raises an OSError if the files can't be written.
+    '''
+    os.makedirs(cache_path, exist_ok=True)
+
+    def replace(filename, write):
+        path = os.path.join(cache_path, filename)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'wb') as file:
+                write(file)
+            os.replace(temp_path, path)
+        except OSError:
+            # Not leaving a partial file behind
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    for colname, col in columns.items():
+        replace(f'{colname}.npy', lambda file: np.save(file, col))
+
+    replace('columns.txt', 
+        lambda file: file.write('\n'.join(all_names).encode()))
+
+
+def load_cached_columns(cache_path, colnames):
+    '''
+    Memory-maps the columns in 'colnames' (or all columns, if None or 'all')
+    cached by 'cache_columns' in 'cache_path'. Returns a dict of arrays in 
+    the order the columns appear in the original table, or None if any of 
+    the columns have not been cached or can't be read.
+    '''
+    try:
+        with open(os.path.join(cache_path, 'columns.txt')) as file:
+            all_names = file.read().split('\n')
+    except OSError:
+        return None
+
+    if colnames is None or colnames == 'all':
+        colnames = set(all_names)
+
+    columns = {}
+    for colname in all_names:
+        if colname in colnames:
+            try:
+                columns[colname] = np.load(
+                    os.path.join(cache_path, f'{colname}.npy'), mmap_mode='r')
+            except OSError:
+                return None
+
+    return columns
+
+
+def find_row_window(data, pos=None, temp_threshold=-20, block_size=65536):
+    '''
+    Finds the rows of a table of detector test data between which the data
+    is good, i.e., the rows between the first and last events with a 
+    temperature above 'temp_threshold' from the detector at position 'pos'.
+
+    The table is scanned in blocks inwards from both ends, so only the 
+    'TEMP' and 'DET_ID' columns of the rows outside of the window (e.g., 
+    during cooldown and warmup) and at its edges are ever read. 
+
+    Arguments:
+        data: astropy.io.fits.FITS_rec or numpy record array
+            The table data, e.g., the 'data' attribute of a FITS HDU. If it
+            is memory-mapped, rows in the middle of the window are never 
+            paged in.
+
+    Keyword Arguments:
+        pos: int
+            The detector position ('DET_ID'). If None, rows are not selected
+            on the basis of position.
+            (default: None)
+        temp_threshold: int or float
+            Rows with a temperature ('TEMP') at or below this value are not 
+            good. If None, rows are not selected on the basis of temperature.
+            (default: -20)
+        block_size: int
+            The number of rows to scan at a time.
+            (default: 65536)
+
+    Return: Tuple(int, int)
+        start: int
+            The index of the first good row.
+        end: int
+            One greater than the index of the last good row. If no row is 
+            good, the window spans the whole table.
+    '''
+    check_positive(block_size=block_size)
+
+    num_rows = len(data)
+
+    def good_rows(block_start, block_end):
+        '''Returns a boolean mask of the good rows in the given block.'''
+        block = data[block_start:block_end]
+        mask = np.ones(len(block), dtype=bool)
+        if temp_threshold is not None:
+            mask &= block.field('TEMP') > temp_threshold
+        if pos is not None:
+            mask &= block.field('DET_ID') == pos
+        return mask
+
+    # Scanning forwards for the first good row
+    for block_start in range(0, num_rows, block_size):
+        mask = good_rows(block_start, block_start + block_size)
+        if mask.any():
+            start = block_start + np.argmax(mask)
+            break
+    else:
+        return 0, num_rows
+
+    # Scanning backwards for the last good row. There is at least one, at 
+    # 'start', so this always breaks.
+    for block_end in range(num_rows, start, -block_size):
+        block_start = max(block_end - block_size, start)
+        mask = good_rows(block_start, block_end)
+        if mask.any():
+            end = block_end - np.argmax(mask[::-1])
+            break
+
+    return int(start), int(end)
+
+
+def native_byte_order(arr, inplace=False):
+    '''
+    Returns 'arr' with its data in the native byte order. FITS data is 
+    stored big-endian, so the bytes are only swapped if they need to be.
+
+    If 'inplace' is True and 'arr' owns its (writeable) data, the bytes are
+    swapped in place and a view of 'arr' with the native dtype is returned,
+    so no copy is made. Otherwise, a swapped copy is returned.
+    '''
+    if arr.dtype.isnative:
+        return arr
+    if inplace and arr.flags.owndata and arr.flags.writeable:
+        return arr.byteswap(inplace=True).view(arr.dtype.newbyteorder())
+    return arr.byteswap().view(arr.dtype.newbyteorder())
+
+
+def channel_bins(channels, first, last):
+    '''
+    Finds the bin of each value in 'channels' in a histogram with unit-width
+    bins whose edges are the integers from 'first' to 'last', i.e., the bins
+    of 'np.histogram(channels, bins=np.arange(first, last + 1))'. As with 
+    numpy, the last bin also includes its upper edge. 
+
+    This lets many histograms with the same bins be accumulated at once with
+    'np.bincount'.
+
+    Arguments:
+        channels: numpy.ndarray
+            The values to be binned, e.g., pulse heights in channels.
+        first: int
+            The lower edge of the first bin.
+        last: int
+            The upper edge of the last bin.
+
+    Return:
+        in_range: numpy.ndarray
+            A boolean array that is True where 'channels' falls in one of 
+            the bins.
+        bins: numpy.ndarray
+            The bin index of each value in 'channels' for which 'in_range'
+            is True.
+    '''
+    channels = np.asarray(channels)
+    in_range = (channels >= first) & (channels <= last)
+
+    if channels.dtype.kind in 'iub':
+        bins = channels[in_range].astype(np.intp) - first
+    else:
+        bins = np.floor(channels[in_range]).astype(np.intp) - first
 
-    original_colnames = colnames
+    # The upper edge of the last bin is inclusive.
+    bins[bins == last - first] -= 1
 
-    # Add in temperature and position data, since we'll need them for trimming
-    # out unnecessary rows of the table later.
-    if temp_threshold is not None:
-        colnames.add('TEMP')
-    if pos is not None:
-        colnames.add('DET_ID')
+    return in_range, bins
 
-    # Get data from FITS file (this line takes a long time to run)
-    table = Table.read(filepath)
 
-    all_names = set(table.colnames)
+def neighbor_sum(values):
+    '''
+    Returns the sum of the 3 x 3 neighborhood around each entry of the 2D 
+    array 'values', treating entries beyond its edges as 0. This is a 
+    convolution with a 3 x 3 box, done as 9 shifted array additions.
+    '''
+    num_rows, num_cols = values.shape
+    padded = np.pad(values, 1)
+
+    total = np.zeros(values.shape, dtype=padded.dtype)
+    for i in range(3):
+        for j in range(3):
+            total += padded[i:i + num_rows, j:j + num_cols]
 
-    # If 'colnames' was not specified, assign it to the set of 
-    # all column names in the table.
-    if colnames is None:
-        colnames = all_names
+    return total
+
+
+def interpolate_empty(values, empty_value=0.0, iterations=1):
+    '''
+    Fills the entries of the 2D array 'values' that equal 'empty_value' 
+    (e.g., pixels whose gain couldn't be fit) with the mean of the 
+    non-empty entries among their 8 neighbors. The whole array is handled 
+    at once by normalized convolution: the sum of the non-empty neighbors
+    of every entry divided by their number (see 'neighbor_sum'). 
+
+    This is repeated 'iterations' times, so empty regions are filled in 
+    from their edges. Each round only uses values filled in by earlier 
+    rounds. Entries with no non-empty neighbors are left empty. Returns a
+    filled copy of 'values' as floats.
+    '''
+    values = np.array(values, dtype=float)
+
+    for _ in range(iterations):
+        valid = values != empty_value
+        if np.all(valid):
+            break
+
+        sums = neighbor_sum(np.where(valid, values, 0))
+        counts = neighbor_sum(valid.astype(int))
+
+        fill = ~valid & (counts > 0)
+        values[fill] = sums[fill] / counts[fill]
+
+    return values
+
+
+def fit_gaussians(x, y, amplitude, mean, stddev, method='levmar', 
+    max_iter=100, tol=1e-7, batch_size=1024, n_jobs=1, window=3):
+    '''
+    Fits a Gaussian to each row of a stack of histograms.
+
+    Arguments:
+        x: numpy.ndarray
+            The bin positions (e.g., channels) of each row of 'y', with 
+            shape (number of fits, number of bins), or (number of bins,) if 
+            all rows share the same bins. This lets each row have its own
+            fitting window.
+        y: numpy.ndarray
+            The counts to fit, with shape (number of fits, number of bins).
+        amplitude, mean, stddev: float or numpy.ndarray
+            The initial guesses for the parameters of each fit.
+
+    Keyword Arguments:
+        method: str
+            If 'levmar', each row is fit on its own with astropy's 
+            'LevMarLSQFitter'. If 'batch', all rows are fit together with
+            a vectorized Levenberg-Marquardt iteration, which avoids the 
+            overhead of fitting thousands of spectra one at a time. Both
+            converge to the same least squares solutions up to 'tol'.
+
+            'moments' and 'log-parabola' are fast closed-form estimators,
+            vectorized like 'batch', for high-statistics peaks that are 
+            close to Gaussian. 'moments' takes the weighted mean and 
+            variance of the counts within 'window' standard deviations of
+            the mean, and 'log-parabola' fits a parabola to the log of 
+            those counts (Caruana's algorithm). Both are iterated, 
+            recentering the window each time. Their covariances are 
+            approximated from counting statistics. 'log-parabola' leaves
+            out empty bins, so it is biased unless most bins in the window 
+            have several counts.
+            (default: 'levmar')
+        max_iter: int
+            The maximum number of iterations for each fit.
+            (default: 100)
+        tol: float
+            The relative tolerance in the parameters at which a fit has 
+            converged.
+            (default: 1e-7)
+        batch_size: int
+            The number of rows fit at once with the vectorized methods, 
+            which bounds the memory they use.
+            (default: 1024)
+        n_jobs: int
+            The number of processes the fits are spread across. If -1, one 
+            process per CPU is used. 'x' and 'y' are passed to the worker 
+            processes through shared memory rather than being pickled, and
+            each worker fits a contiguous range of rows, so the results 
+            are identical to fitting in a single process.
+            (default: 1)
+        window: float
+            The half-width, in standard deviations, of the window of bins
+            used by 'moments' and 'log-parabola'.
+            (default: 3)
+
+    Return:
+        params: numpy.ndarray
+            The fit amplitude, mean and standard deviation of each row,
+            with shape (number of fits, 3). Filled with nan where the fit
+            raised an error.
+        cov: numpy.ndarray
+            The covariance matrix of the parameters of each fit, with shape
+            (number of fits, 3, 3), scaled by the reduced sum of squared 
+            residuals as in astropy. Filled with nan where the covariance
+            could not be determined.
+        converged: numpy.ndarray
+            A boolean array, True for fits whose covariance could be 
+            determined, which implies that the fit succeeded.
+    '''
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    num_fits, num_points = y.shape
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+
+    params = np.empty((num_fits, 3))
+    params[:, 0] = amplitude
+    params[:, 1] = mean
+    params[:, 2] = stddev
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs > 1 and num_fits > 1:
+        return _fit_gaussians_parallel(x, y, params, n_jobs, method=method, 
+            max_iter=max_iter, tol=tol, batch_size=batch_size, 
+            window=window)
+
+    cov = np.full((num_fits, 3, 3), np.nan)
+    converged = np.zeros(num_fits, dtype=bool)
+
+    if method == 'levmar':
+        for i in range(num_fits):
+            g_init = models.Gaussian1D(*params[i])
+            fit_g = fitting.LevMarLSQFitter()
+            try:
+                g = fit_g(g_init, x[i if len(x) > 1 else 0], y[i], 
+                    maxiter=max_iter, acc=tol)
+            except fitting.NonFiniteValueError:
+                # The fit ran away (e.g., the width collapsed to zero on a 
+                # spectrum of a few counts), so it failed. Its parameters 
+                # are not measurements, so they are left out.
+                params[i] = np.nan
+                continue
+            params[i] = g.parameters
+            if fit_g.fit_info['param_cov'] is not None:
+                cov[i] = fit_g.fit_info['param_cov']
+                converged[i] = True
+
+    elif method == 'batch':
+        for start in range(0, num_fits, batch_size):
+            batch = slice(start, start + batch_size)
+            params[batch], cov[batch], converged[batch] = \
+                _levmar_gaussians(x[batch] if len(x) > 1 else x, y[batch], 
+                    params[batch], max_iter, tol)
+
+    elif method in ('moments', 'log-parabola'):
+        for start in range(0, num_fits, batch_size):
+            batch = slice(start, start + batch_size)
+            params[batch], cov[batch], converged[batch] = \
+                _closed_form_gaussians(x[batch] if len(x) > 1 else x, 
+                    y[batch], params[batch], method, window, max_iter, tol)
+
+    else:
+        raise ValueError("'method' should be 'levmar', 'batch', 'moments' "
+            + f"or 'log-parabola', not {method!r}")
+
+    return params, cov, converged
+
+
+def _fit_gaussians_parallel(x, y, params, n_jobs, **kwargs):
+    '''
+    Spreads the fits of 'fit_gaussians' across a pool of 'n_jobs' 
+    processes. 'x' and 'y' are copied into shared memory once, and each 
+    task fits a contiguous range of rows, so the results are assembled in 
+    the same order no matter which worker finishes first.
+    '''
+    num_fits = len(y)
+    # A few tasks per process balance the load between them.
+    num_tasks = min(num_fits, 4 * n_jobs)
+    bounds = np.linspace(0, num_fits, num_tasks + 1).astype(int)
+
+    blocks = []
+    try:
+        for arr in (x, y):
+            block = shared_memory.SharedMemory(create=True, 
+                size=max(arr.nbytes, 1))
+            blocks.append(block)
+            np.ndarray(arr.shape, dtype=float, buffer=block.buf)[:] = arr
+        specs = [(block.name, arr.shape) for block, arr in zip(blocks, 
+            (x, y))]
+
+        results = [None] * num_tasks
+        with concurrent.futures.ProcessPoolExecutor(n_jobs) as executor:
+            futures = {executor.submit(_fit_gaussians_worker, specs, 
+                start, end, params[start:end], kwargs): task 
+                for task, (start, end) in enumerate(zip(bounds[:-1], 
+                    bounds[1:]))}
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    return tuple(np.concatenate(arrays) for arrays in zip(*results))
+
+
+def _fit_gaussians_worker(specs, start, end, params, kwargs):
+    '''
+    Fits rows 'start' to 'end' of the arrays in shared memory described by
+    'specs', for '_fit_gaussians_parallel'.
+    '''
+    blocks = [shared_memory.SharedMemory(name=name) for name, _ in specs]
+    try:
+        x, y = (np.ndarray(shape, dtype=float, buffer=block.buf) 
+            for block, (_, shape) in zip(blocks, specs))
+        if len(x) > 1:
+            x = x[start:end]
+        result = fit_gaussians(x, y[start:end], params[:, 0], params[:, 1],
+            params[:, 2], **kwargs)
+        del x, y
+    finally:
+        for block in blocks:
+            block.close()
+
+    return result
+
+
+def _gaussian_jacobian(x, params):
+    '''
+    Returns the Gaussians with parameters 'params' (shape (fits, 3)) 
+    evaluated at 'x' (shape (fits, points)), and their derivatives with 
+    respect to the parameters (shape (fits, 3, points)).
+    '''
+    amplitude, mean, stddev = (params[:, i, np.newaxis] for i in range(3))
+    jac = np.empty((len(params), 3) + x.shape[1:])
 
-    # Remove any columns not in 'colnames'. Doing this early lowers
-    # RAM usage, which may be vital with big tables.
-    excluded_colnames = all_names - colnames
-    table.remove_columns(excluded_colnames)
+    z = np.divide(x - mean, stddev)
+    np.exp(-0.5 * np.square(z), out=jac[:, 0])
+    model = amplitude * jac[:, 0]
+    np.multiply(model, z / stddev, out=jac[:, 1])
+    np.multiply(jac[:, 1], z, out=jac[:, 2])
 
-    col_length = table['TEMP'].shape[0]
+    return model, jac
 
-    mask = np.ones(col_length, dtype=bool)
 
-    # 'start' and 'end' denote the indices between which 'table['TEMP']'
-    # takes on a resonable value. start is the first index with a 
-    # temperature greater than -20 C, and end is the last such index.
-    if temp_threshold is not None:
-        mask *= table['TEMP'] > temp_threshold
-    if pos is not None:
-        mask *= table['DET_ID'] == pos
+def _levmar_gaussians(x, y, params, max_iter, tol):
+    '''
+    A vectorized Levenberg-Marquardt fit of a Gaussian to each row of 'y',
+    for 'fit_gaussians'. Every fit takes its own steps, with its own 
+    damping, and stops once it has converged. 'x' may have a single row if
+    it is shared by all of the fits.
+    '''
+    num_fits, num_points = y.shape
+    params = params.copy()
+    shared_x = len(x) == 1 and num_fits > 1
+
+    # The relative tolerance in the sum of squared residuals, the default
+    # of scipy's 'leastsq' (which astropy's 'LevMarLSQFitter' uses)
+    ftol = np.sqrt(np.finfo(float).eps)
+    # The lower bound on the standard deviation in astropy's 'Gaussian1D'
+    min_stddev = np.finfo(np.float32).tiny
+
+    model, jac = _gaussian_jacobian(x, params)
+    resid = y - model
+    ssr = np.sum(np.square(resid), axis=1)
+    damping = np.full(num_fits, 1e-3)
+
+    # The working arrays only hold the fits that are still running. 'fits'
+    # holds their indices in the output arrays.
+    fits = np.arange(num_fits)
+    final_params = params.copy()
+    final_jac = np.empty_like(jac)
+    final_ssr = ssr.copy()
+    work = (params, jac, resid, ssr, damping, y, x)
+
+    for _ in range(max_iter):
+        params, jac, resid, ssr, damping, y, x = work
+
+        # Solving the damped normal equations for each fit, with 
+        # Marquardt's scaling of the damping by the diagonal.
+        jtj = jac @ jac.transpose(0, 2, 1)
+        jtr = (jac @ resid[..., np.newaxis])[..., 0]
+        diag = np.diagonal(jtj, axis1=1, axis2=2)
+        damped = jtj + np.eye(3) * (damping[:, np.newaxis] 
+            * np.maximum(diag, np.finfo(float).tiny))[:, np.newaxis, :]
+        try:
+            step = np.linalg.solve(damped, jtr[..., np.newaxis])[..., 0]
+        except np.linalg.LinAlgError:
+            # Some matrices are singular, so solve them one at a time,
+            # falling back on the pseudo-inverse only for those. This keeps
+            # each fit independent of the others in its batch.
+            step = np.empty_like(jtr)
+            for i in range(len(jtr)):
+                try:
+                    step[i] = np.linalg.solve(damped[i], jtr[i])
+                except np.linalg.LinAlgError:
+                    step[i] = np.linalg.pinv(damped[i]) @ jtr[i]
+
+        # Like astropy, the standard deviation is kept positive.
+        new_params = params + step
+        np.maximum(new_params[:, 2], min_stddev, out=new_params[:, 2])
+        new_model, new_jac = _gaussian_jacobian(x, new_params)
+        new_resid = y - new_model
+        new_ssr = np.sum(np.square(new_resid), axis=1)
+
+        # Steps that lower the residuals are taken, and the damping of the
+        # fit is lowered. Otherwise, the step is rejected and the damping
+        # is raised, shortening the next step.
+        better = np.isfinite(new_ssr) & (new_ssr <= ssr)
+        small_step = np.all(np.abs(step) <= tol * (np.abs(new_params) + tol),
+            axis=1)
+        small_change = ssr - new_ssr <= ftol * ssr
+
+        np.copyto(params, new_params, where=better[:, np.newaxis])
+        np.copyto(jac, new_jac, where=better[:, np.newaxis, np.newaxis])
+        np.copyto(resid, new_resid, where=better[:, np.newaxis])
+        np.copyto(ssr, new_ssr, where=better)
+        damping[better] /= 10
+        damping[~better] *= 10
+
+        # A fit stops once its steps or improvements become negligible, or
+        # if no step short enough to improve it can be found.
+        done = (better & (small_step | small_change)) | (damping > 1e16)
+        if np.any(done):
+            final_params[fits[done]] = params[done]
+            final_jac[fits[done]] = jac[done]
+            final_ssr[fits[done]] = ssr[done]
+            keep = ~done
+            fits = fits[keep]
+            work = tuple(arr if arr is x and shared_x else arr[keep] 
+                for arr in (params, jac, resid, ssr, damping, y, x))
+            if not fits.size:
+                break
+
+    # Fits that ran out of iterations keep their last parameters.
+    params, jac, resid, ssr = work[:4]
+    final_params[fits] = params
+    final_jac[fits] = jac
+    final_ssr[fits] = ssr
+    params, jac, ssr = final_params, final_jac, final_ssr
+
+    # The covariance of the parameters, as computed by astropy from 
+    # scipy's 'leastsq'.
+    jtj = jac @ jac.transpose(0, 2, 1)
+    try:
+        cov = np.linalg.inv(jtj)
+    except np.linalg.LinAlgError:
+        # Some matrices are singular, so invert them one at a time.
+        cov = np.full((num_fits, 3, 3), np.nan)
+        for i in range(num_fits):
+            try:
+                cov[i] = np.linalg.inv(jtj[i])
+            except np.linalg.LinAlgError:
+                continue
+    cov *= (ssr / (num_points - 3))[:, np.newaxis, np.newaxis]
+
+    converged = np.all(np.isfinite(cov), axis=(1, 2)) & np.isfinite(params
+        ).all(axis=1) & (num_points > 3)
+    cov[~converged] = np.nan
+
+    return params, cov, converged
+
+
+def _gaussian_count_cov(params, dx):
+    '''
+    Returns approximate covariance matrices (shape (fits, 3, 3)) for the
+    Gaussians with parameters 'params' (shape (fits, 3)) estimated from 
+    histograms with bin width 'dx', from counting statistics alone: with N
+    counts under a peak, the variances of the mean and standard deviation
+    are stddev**2 / N and stddev**2 / 2N, and that of the amplitude is
+    3 amplitude**2 / 2N.
+    '''
+    amplitude, mean, stddev = params.T
+    counts = amplitude * stddev * np.sqrt(2 * np.pi) / dx
+
+    cov = np.zeros((len(params), 3, 3))
+    cov[:, 0, 0] = 1.5 * np.square(amplitude) / counts
+    cov[:, 1, 1] = np.square(stddev) / counts
+    cov[:, 2, 2] = 0.5 * np.square(stddev) / counts
+
+    return cov
+
+
+def _closed_form_gaussians(x, y, params, method, window, max_iter, tol):
+    '''
+    Estimates the Gaussian in each row of 'y' (shape (fits, points)) at 
+    'x' (shape (fits, points), or (1, points) if shared) in closed form,
+    starting from 'params' (shape (fits, 3)), for 'fit_gaussians'. Each 
+    estimate only uses the bins within 'window' standard deviations of the
+    mean, and is repeated with the window recentered on the new estimate 
+    until the mean and standard deviation change by less than 'tol' 
+    relative to the standard deviation, or for 'max_iter' rounds.
+
+    With 'moments', the mean and variance are the weighted moments of the 
+    counts in the window, corrected for the tails cut off by the window, 
+    and the amplitude follows from the number of counts. With 
+    'log-parabola', a parabola is fit to the log of the counts in the 
+    window by linear least squares (Caruana's algorithm), weighted by the
+    squared counts in the first round and the squared model afterwards 
+    (as suggested by Guo 2011), which keeps the noisy low-count bins from
+    biasing the fit.
+    '''
+    num_fits = len(y)
+    x = np.broadcast_to(x, y.shape)
+    dx = np.median(np.abs(np.diff(x, axis=1)), axis=1)
+
+    amplitude, mean, stddev = (params[:, i].copy() for i in range(3))
+    stddev = np.abs(stddev)
+
+    # Fraction of a Gaussian, and of its variance, within 'window' standard
+    # deviations of the mean
+    coverage = math.erf(window / np.sqrt(2))
+    var_coverage = 1 - 2 * window * np.exp(-0.5 * window ** 2) \
+        / np.sqrt(2 * np.pi) / coverage
+
+    # The fits that haven't converged yet. Only these are updated.
+    active = np.arange(num_fits)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for round_num in range(max_iter):
+            a, m, s = amplitude[active], mean[active], stddev[active]
+            ya = y[active]
+            u = (x[active] - m[:, np.newaxis]) / s[:, np.newaxis]
+            inside = np.abs(u) <= window
+
+            if method == 'moments':
+                w = np.where(inside, ya, 0)
+                counts = w.sum(axis=1)
+                shift = np.sum(w * u, axis=1) / counts
+                variance = np.sum(w * np.square(u - shift[:, np.newaxis]), 
+                    axis=1) / counts / var_coverage
+                new_mean = m + shift * s
+                new_stddev = np.sqrt(variance) * s
+                new_amplitude = counts * dx[active] \
+                    / (new_stddev * np.sqrt(2 * np.pi) * coverage)
+            else:
+                inside &= ya > 0
+                if round_num == 0:
+                    w = np.where(inside, np.square(ya), 0)
+                else:
+                    w = np.where(inside, np.square(a[:, np.newaxis] 
+                        * np.exp(-0.5 * np.square(u))), 0)
+                log_y = np.log(np.where(inside, ya, 1))
+
+                # Normal equations of the weighted fit of 
+                # log(y) = c0 + c1 u + c2 u**2
+                wu = w * u
+                wu2 = wu * u
+                sums = [w.sum(axis=1), wu.sum(axis=1), wu2.sum(axis=1), 
+                    np.sum(wu2 * u, axis=1), np.sum(wu2 * np.square(u), 
+                    axis=1)]
+                lhs = np.stack([np.stack(sums[i:i + 3], axis=-1) 
+                    for i in range(3)], axis=1)
+                rhs = np.stack([np.sum(weights * log_y, axis=1) 
+                    for weights in (w, wu, wu2)], axis=-1)
+
+                # Fits with fewer than 3 bins can't be solved.
+                solvable = np.count_nonzero(w, axis=1) >= 3
+                lhs[~solvable] = np.eye(3)
+                c0, c1, c2 = np.linalg.solve(lhs, rhs[..., np.newaxis])[
+                    ..., 0].T
+                c2 = np.where(solvable & (c2 < 0), c2, np.nan)
+
+                new_mean = m - c1 / (2 * c2) * s
+                new_stddev = np.sqrt(-0.5 / c2) * s
+                new_amplitude = np.exp(c0 - np.square(c1) / (4 * c2))
+
+            done = (np.abs(new_mean - m) <= tol * new_stddev) \
+                & (np.abs(new_stddev - s) <= tol * new_stddev)
+            amplitude[active] = new_amplitude
+            mean[active] = new_mean
+            stddev[active] = new_stddev
+
+            active = active[~done & np.isfinite(new_stddev)]
+            if not active.size:
+                break
+
+    params = np.column_stack([amplitude, mean, stddev])
+    converged = np.isfinite(params).all(axis=1) & (stddev > 0) \
+        & (amplitude > 0)
+
+    cov = np.full((num_fits, 3, 3), np.nan)
+    cov[converged] = _gaussian_count_cov(params[converged], dx[converged])
+
+    return params, cov, converged
+
+
+##
+## Functions for processing blocks of events. They are defined at module 
+## level, taking only the state they need, so that they can be sent to 
+## worker processes cheaply (see 'GammaFlood._fold_raw_data').
+##
+
+def _region_index(rawx, rawy, region):
+    '''
+    A helper function for vectorized processing of event data. Given the
+    pixel coordinates 'rawx' and 'rawy' of some events and 'region', the 
+    (first row, first column, number of rows, number of columns) of the 
+    analyzed region of the detector, returns:
+        in_region: a boolean array, True for events in the analyzed
+            region of the detector.
+        maprow: the row of each event's pixel relative to the region
+        mapcol: the column of each event's pixel relative to the region
+    'maprow' and 'mapcol' are integer arrays that can index arrays of the
+    shape of the region wherever 'in_region' is True.
+    '''
+    start_row, start_col, num_rows, num_cols = region
+    maprow = np.asarray(rawy).astype(np.intp) - start_row
+    mapcol = np.asarray(rawx).astype(np.intp) - start_col
+
+    in_region = (maprow >= 0) & (maprow < num_rows) \
+        & (mapcol >= 0) & (mapcol < num_cols)
+
+    return in_region, maprow, mapcol
+
+
+def _fold_count_map(blocks, region, mask_PH=True, mask_STIM=True):
+    '''
+    Returns the number of events at each pixel of 'region' (as in 
+    '_region_index') in 'blocks', for 'GammaFlood.gen_count_map'. See 
+    '_count_block'.
+    '''
+    count_map = np.zeros(region[2:], dtype='uint32')
+    for block in blocks:
+        count_map += _count_block(block, region, mask_PH, mask_STIM)
+
+    return count_map
+
+
+def _fold_channel_spectra(blocks, region, chan_range, sparse=False):
+    '''
+    Returns a 'PixelHistograms' of the 'PH' channels of the events in
+    'blocks' at each pixel of 'region' (as in '_region_index'), with 
+    unit-width bins between the channels 'chan_range', for 
+    'GammaFlood.gen_quick_gain'.
+    '''
+    spectra = PixelHistograms(region[2:], *chan_range, sparse=sparse)
+    for block in blocks:
+        spectra.add(*_channel_block(block, region))
+
+    return spectra
+
+
+def _fold_energy_spectrum(blocks, region, gain, bins, energy_range):
+    '''
+    Returns an 'EnergySpectrum' of the events in 'blocks', for 
+    'GammaFlood.gen_spectrum'. 'region' and 'gain' are as in 
+    '_energy_block', and 'bins' and 'energy_range' are as in 
+    'EnergySpectrum'.
+    '''
+    spectrum = EnergySpectrum(bins, energy_range)
+    for block in blocks:
+        spectrum.add(_energy_block(block, region, gain))
+
+    return spectrum
+
+
+def _fold_energies(blocks, region, gain):
+    '''
+    Returns a list of arrays of the energies of the events in each of 
+    'blocks', as 'float32', for 'GammaFlood.gen_energies'. 'region' and 
+    'gain' are as in '_energy_block'.
+    '''
+    return [_energy_block(block, region, gain).astype(np.float32) 
+        for block in blocks]
+
+
+def _count_block(block, region, mask_PH=True, mask_STIM=True):
+    '''
+    Returns the number of events at each pixel of 'region' (as in 
+    '_region_index') in 'block', a dict of arrays of event data as yielded
+    by 'iter_raw_data' or '_raw_data_blocks'. 'mask_PH' and 'mask_STIM' 
+    are as in 'GammaFlood.gen_count_map'.
+
+    Each event's pixel is converted to a linear index into the region,
+    and the events are counted with a single 'np.bincount', so this 
+    takes one pass over the events no matter how many pixels there are.
+    '''
+    num_rows, num_cols = region[2:]
+    in_region, maprow, mapcol = _region_index(block['RAWX'], block['RAWY'],
+        region)
+
+    mask = in_region
+    if mask_STIM:
+        mask &= np.asarray(block['STIM']) == 0
+    if mask_PH:
+        mask &= np.asarray(block['PH']) > 0
+
+    # Linear index of each event's pixel
+    pixels = maprow[mask] * num_cols + mapcol[mask]
+
+    count_map = np.bincount(pixels, 
+        minlength=num_rows * num_cols).astype('uint32')
+
+    return count_map.reshape(num_rows, num_cols)
+
+
+def _channel_block(block, region):
+    '''
+    Returns the linear index of the pixel of each event in 'block' in 
+    'region' (as in '_region_index'), along with its 'PH' channel, to be 
+    added to a 'PixelHistograms' with cells of shape (rows, columns).
+    '''
+    in_region, maprow, mapcol = _region_index(block['RAWX'], block['RAWY'],
+        region)
+
+    # Linear index of each event's pixel
+    pixels = maprow[in_region] * region[3] + mapcol[in_region]
+
+    return pixels, block['PH'][in_region]
+
+
+def _energy_block(block, region, gain):
+    '''
+    Returns the energy of each event in 'block' in 'region' (as in 
+    '_region_index'): the sum of the positive 'PH_COM' values in the 
+    3 x 3 grid around the event, each multiplied by its pixel's gain. 
+    'gain' must have a one pixel buffer around the region (see 
+    'GammaFlood._buffer_gain').
+
+    The gains of each event's 3 x 3 grid are gathered from 'gain' with
+    fancy indexing, so all of the events in the block are handled in a
+    few array operations.
+    '''
+    in_region, maprow, mapcol = _region_index(block['RAWX'], block['RAWY'],
+        region)
+
+    maprow = maprow[in_region]
+    mapcol = mapcol[in_region]
+    ph_com = block['PH_COM'][in_region]
+
+    # Indices into 'gain' of the 3 x 3 grid around each event, ordered
+    # like PH_COM. The buffer in 'gain' shifts indices over by one, so
+    # (maprow, mapcol) is the top left corner of the grid.
+    grid_rows = maprow[:, np.newaxis] + np.arange(9) // 3
+    grid_cols = mapcol[:, np.newaxis] + np.arange(9) % 3
+
+    pulses = np.where(ph_com > 0, ph_com, 0)
+
+    return np.sum(pulses * gain[grid_rows, grid_cols], axis=1)
+
+
+##
+## Classes for storing and indexing event data in memory.
+##
+
+class EventTable:
+    '''
+    A compact struct-of-arrays store of event data, e.g., as loaded by 
+    'fits_to_df'. Columns are downcast to the smallest dtype that holds 
+    their values (pixel coordinates and starting capacitors to 'uint8', 
+    pulse heights to 'int16'), and the boolean flags 'STIM' and 'UP' are 
+    packed as bits of a single 'uint8' array. This cuts the memory taken by
+    the scalar columns several-fold, and keeps vectorized passes over the 
+    events cache-friendly.
+
+    Instances behave like a read-only dict of numpy arrays keyed by column 
+    name, so they can stand in for the raw data DataFrames (and the blocks 
+    yielded by 'iter_fits_chunks') anywhere columns are accessed by name. 
+    Packed flags are unpacked to boolean arrays when accessed. Note that 
+    arithmetic on 'uint8' columns can overflow, so convert them to a wider 
+    integer type (as in 'Experiment._region_index') before using them to 
+    compute indices.
+
+    Public Class Attributes:
+        compact_dtypes: dict (keys: str, values: str)
+            The dtype each column is downcast to, if its values fit.
+        flag_bits: dict (keys: str, values: int)
+            The bit of the packed flags holding each boolean column.
+
+    Public Instance Attributes:
+        nbytes: int
+            The total number of bytes in all stored arrays.
+
+    Private Instance Attributes:
+        _columns: dict of numpy.ndarray
+            The stored (unpacked) columns, keyed by name.
+        _flags: numpy.ndarray
+            The packed flag bits of each event, or None if no flags are 
+            packed.
+        _colnames: list of str
+            The names of all columns, in their original order.
+    '''
+    compact_dtypes = {'RAWX': 'uint8', 'RAWY': 'uint8', 'S_CAP': 'uint8', 
+        'PH': 'int16', 'PH_RAW': 'int16', 'PH_COM': 'int16'}
+    flag_bits = {'STIM': 0, 'UP': 1}
+
+    def __init__(self, columns):
+        '''
+        Arguments:
+            columns: dict of array-like
+                Columns of event data keyed by name, all of the same length.
+                Boolean (or 0/1) columns named in 'flag_bits' are packed,
+                and columns named in 'compact_dtypes' are downcast if all 
+                of their values fit in the smaller dtype. Other columns are 
+                stored as they are.
+        '''
+        self._columns = {}
+        self._flags = None
+        self._colnames = list(columns)
+
+        for colname, col in columns.items():
+            col = np.asarray(col)
+
+            if colname in self.flag_bits and col.ndim == 1 \
+                and np.all((col == 0) | (col == 1)):
+                if self._flags is None:
+                    self._flags = np.zeros(col.shape, dtype=np.uint8)
+                bits = col.astype(np.uint8) << self.flag_bits[colname]
+                self._flags |= bits
+                continue
+
+            if colname in self.compact_dtypes and col.size:
+                dtype = np.dtype(self.compact_dtypes[colname])
+                info = np.iinfo(dtype)
+                if col.dtype.kind in 'iub' and col.min() >= info.min \
+                    and col.max() <= info.max:
+                    col = col.astype(dtype)
+
+            self._columns[colname] = col
+
+        self.nbytes = sum(col.nbytes for col in self._columns.values())
+        if self._flags is not None:
+            self.nbytes += self._flags.nbytes
+
+
+    def __getitem__(self, colname):
+        if colname in self._columns:
+            return self._columns[colname]
+        if colname in self._colnames:
+            return (self._flags >> self.flag_bits[colname]) & 1 == 1
+        raise KeyError(colname)
+
+
+    def __contains__(self, colname):
+        return colname in self._colnames
+
+
+    def __iter__(self):
+        return iter(self._colnames)
+
+
+    def __len__(self):
+        '''Returns the number of events.'''
+        if self._flags is not None:
+            return len(self._flags)
+        return len(next(iter(self._columns.values()), ()))
+
+
+    def keys(self):
+        return list(self._colnames)
+
+
+class PixelIndex:
+    '''
+    An index of events by pixel, in compressed sparse row (CSR) form: a 
+    permutation that sorts the events by pixel (and optionally by starting
+    capacitor within each pixel), along with the offset of each pixel's 
+    first event in that order. Built in a single sort, it gives the events 
+    at any pixel in constant time, rather than by comparing the coordinates 
+    of every event against those of the pixel.
+
+    The sort is stable, so the events at each pixel stay in their original
+    order. Events whose coordinates fall outside the detector are left out.
+
+    Public Instance Attributes:
+        order: numpy.ndarray
+            The indices of the events, sorted by pixel (and capacitor).
+        offsets: numpy.ndarray
+            An array of shape (rows, columns, caps + 1). The events at pixel
+            (row, col) with starting capacitor 'cap' are 
+            'order[offsets[row, col, cap]:offsets[row, col, cap + 1]]'. 
+            'caps' is 1 if the index was not keyed by capacitor.
+        num_caps: int
+            The number of capacitors the index is keyed by, or 1.
+    '''
+    def __init__(self, rawx, rawy, s_cap=None, num_caps=16, 
+        det_shape=(32, 32)):
+        '''
+        Arguments:
+            rawx: array-like
+                The column of each event's pixel.
+            rawy: array-like
+                The row of each event's pixel.
+
+        Keyword Arguments:
+            s_cap: array-like
+                If not None, the starting capacitor of each event. The
+                events at each pixel are then also sorted by capacitor.
+                (default: None)
+            num_caps: int
+                The number of starting capacitors. Ignored if 's_cap' is 
+                None.
+                (default: 16)
+            det_shape: Tuple(int, int)
+                The dimensions in pixels of the detector.
+                (default: (32, 32))
+        '''
+        rawx = np.asarray(rawx).astype(np.intp)
+        rawy = np.asarray(rawy).astype(np.intp)
+        num_rows, num_cols = det_shape
+
+        self.num_caps = 1 if s_cap is None else num_caps
+        num_keys = num_rows * num_cols * self.num_caps
+
+        # The sort key of each event. Events outside the detector get the
+        # largest key, which sorts them after every pixel.
+        keys = (rawy * num_cols + rawx) * self.num_caps
+        valid = (rawx >= 0) & (rawx < num_cols) & (rawy >= 0) \
+            & (rawy < num_rows)
+        if s_cap is not None:
+            s_cap = np.asarray(s_cap).astype(np.intp)
+            keys += s_cap
+            valid &= (s_cap >= 0) & (s_cap < num_caps)
+        keys[~valid] = num_keys
+
+        self.order = np.argsort(keys, kind='stable')
+
+        counts = np.bincount(keys, minlength=num_keys + 1)[:num_keys]
+        offsets = np.zeros(num_keys + 1, dtype=np.intp)
+        np.cumsum(counts, out=offsets[1:])
+
+        # Pixel (row, col) spans offsets[row, col, 0] to offsets[row, col, 
+        # caps], which is also the first offset of the next pixel.
+        self.offsets = np.empty((num_rows, num_cols, self.num_caps + 1), 
+            dtype=np.intp)
+        self.offsets[..., :-1] = offsets[:-1].reshape(num_rows, num_cols, 
+            self.num_caps)
+        self.offsets[..., -1] = offsets[self.num_caps::self.num_caps
+            ].reshape(num_rows, num_cols)
+
+
+    def events(self, row, col, start_cap=None):
+        '''
+        Returns the indices of the events at pixel ('row', 'col') of the
+        detector, or only those with starting capacitor 'start_cap' if it 
+        is not None.
+        '''
+        if start_cap is None:
+            start, end = self.offsets[row, col, 0], self.offsets[row, col, -1]
+        elif self.num_caps == 1:
+            raise ValueError('This index is not keyed by starting capacitor.')
+        else:
+            start, end = self.offsets[row, col, start_cap:start_cap + 2]
+
+        return self.order[start:end]
+
+
+class PixelHistograms:
+    '''
+    A channel histogram for each cell of a grid, e.g., each pixel of the 
+    analyzed region, or each pixel and starting capacitor. Events are added
+    in blocks as (cell, channel) pairs and binned straight into the 
+    histograms, so no per-event data is kept, and histograms accumulated 
+    separately (from different chunks of a file, or from different files) 
+    can be merged by adding them.
+
+    Bins have unit width, with edges at the integers from 'first' to 
+    'last' (see 'channel_bins'). Counts are stored as 'uint32', either in a
+    dense array with one row per cell, or sparsely as the flat index and 
+    count of each nonzero bin, which takes less memory when most bins are 
+    empty.
+
+    Public Class Attributes:
+        dtype: type
+            The dtype of the stored counts.
+
+    Public Instance Attributes:
+        shape: tuple of int
+            The shape of the grid of cells.
+        first: int
+            The lower edge of the first bin.
+        last: int
+            The upper edge of the last bin.
+        bins: numpy.ndarray
+            The bin edges, i.e., the integers from 'first' to 'last'.
+        num_bins: int
+            The number of bins in each histogram.
+        sparse: bool
+            Whether the histograms are stored sparsely.
+        counts: numpy.ndarray
+            The number of events added at each cell, including those 
+            outside of the bins, with shape 'shape'.
+
+    Private Instance Attributes:
+        _spectra: numpy.ndarray
+            The dense histograms, with shape (cells, bins), or None if 
+            'sparse' is True.
+        _keys: numpy.ndarray
+            The sorted flat index (cell * bins + bin) of each nonzero bin of
+            the sparse histograms.
+        _values: numpy.ndarray
+            The count in each of the bins in '_keys'.
+    '''
+    dtype = np.uint32
+
+    def __init__(self, shape, first, last, sparse=False):
+        '''
+        Arguments:
+            shape: tuple of int
+                The shape of the grid of cells.
+            first: int
+                The lower edge of the first bin.
+            last: int
+                The upper edge of the last bin.
+
+        Keyword Arguments:
+            sparse: bool
+                If True, only the nonzero bins are stored.
+                (default: False)
+        '''
+        self.shape = tuple(shape)
+        self.first = first
+        self.last = last
+        self.bins = np.arange(first, last + 1)
+        self.num_bins = last - first
+        self.sparse = sparse
+        self.counts = np.zeros(self.shape, dtype=self.dtype)
+
+        if sparse:
+            self._spectra = None
+            self._keys = np.zeros(0, dtype=np.intp)
+            self._values = np.zeros(0, dtype=self.dtype)
+        else:
+            self._spectra = np.zeros((self.counts.size, self.num_bins), 
+                dtype=self.dtype)
+
+
+    @property
+    def nbytes(self):
+        '''The number of bytes taken by the stored counts.'''
+        if self.sparse:
+            return self.counts.nbytes + self._keys.nbytes \
+                + self._values.nbytes
+        return self.counts.nbytes + self._spectra.nbytes
+
+
+    def add(self, cells, channels):
+        '''
+        Adds events to the histograms.
+
+        Arguments:
+            cells: array-like
+                The flat index of each event's cell in the grid, e.g., as 
+                from 'np.ravel_multi_index'.
+            channels: array-like
+                The channel of each event.
+        '''
+        cells = np.asarray(cells, dtype=np.intp)
+        in_range, chan_bins = channel_bins(channels, self.first, self.last)
+
+        self._accumulate(self.counts.reshape(-1), cells)
+
+        keys = cells[in_range] * self.num_bins + chan_bins
+        if self.sparse:
+            keys, values = np.unique(keys, return_counts=True)
+            self._merge_sparse(keys, values)
+        else:
+            self._accumulate(self._spectra.reshape(-1), keys)
+
+
+    def merge(self, other):
+        '''
+        Adds the histograms of 'other', another instance with the same 
+        cells and bins, to these. Returns this instance.
+        '''
+        if (other.shape, other.first, other.last) \
+            != (self.shape, self.first, self.last):
+            raise ValueError('Histograms with different cells or bins '
+                + 'cannot be merged.')
+
+        np.add(self.counts, other.counts, out=self.counts, casting='unsafe')
+        if other.sparse:
+            keys, values = other._keys, other._values
+        else:
+            keys = np.flatnonzero(other._spectra)
+            values = other._spectra.reshape(-1)[keys]
+
+        if self.sparse:
+            self._merge_sparse(keys, values)
+        else:
+            self._spectra.reshape(-1)[keys] += values
+
+        return self
+
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+
+    def sum(self, axis=0):
+        '''
+        Returns a new instance with the histograms summed over 'axis' of 
+        the grid of cells, e.g., over the starting capacitors of a grid of 
+        shape (capacitors, rows, columns).
+        '''
+        axis = range(len(self.shape))[axis]
+        shape = self.shape[:axis] + self.shape[axis + 1:]
+        summed = PixelHistograms(shape, self.first, self.last, 
+            sparse=self.sparse)
+        summed.counts = self.counts.sum(axis=axis, dtype=self.dtype)
+
+        if self.sparse:
+            cells, chan_bins = np.divmod(self._keys, self.num_bins)
+            index = list(np.unravel_index(cells, self.shape))
+            del index[axis]
+            keys = np.ravel_multi_index(index, shape) * self.num_bins \
+                + chan_bins
+            summed._merge_sparse(keys, self._values)
+        else:
+            summed._spectra = self.spectra().sum(axis=axis, 
+                dtype=self.dtype).reshape(-1, self.num_bins)
+
+        return summed
+
+
+    def spectra(self, cells=None):
+        '''
+        Returns the histograms of 'cells' as a dense array with one row per
+        cell. 'cells' may be an array of flat cell indices, or a tuple of 
+        index arrays like that returned by 'np.nonzero'. If 'cells' is 
+        None, the histograms of all cells are returned, with shape 
+        ('shape' + (bins,)).
+        '''
+        if cells is None:
+            if not self.sparse:
+                return self._spectra.reshape(self.shape + (self.num_bins,))
+            flat = np.arange(self.counts.size)
+        elif isinstance(cells, tuple):
+            flat = np.ravel_multi_index(cells, self.shape)
+        else:
+            flat = np.asarray(cells, dtype=np.intp)
+
+        if not self.sparse:
+            return self._spectra[flat]
+
+        spectra = np.zeros((flat.size, self.num_bins), dtype=self.dtype)
+
+        # The nonzero bins of each cell are a contiguous run of '_keys'.
+        key_cells = self._keys // self.num_bins
+        starts = np.searchsorted(key_cells, flat, side='left')
+        lengths = np.searchsorted(key_cells, flat, side='right') - starts
+        rows = np.repeat(np.arange(flat.size), lengths)
+        pos = np.arange(lengths.sum()) \
+            + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        spectra[rows, self._keys[pos] % self.num_bins] = self._values[pos]
+
+        if cells is None:
+            return spectra.reshape(self.shape + (self.num_bins,))
+        return spectra
+
+
+    def _accumulate(self, flat, keys):
+        '''
+        Adds one to the entry of 'flat' at each of 'keys'. Few keys are 
+        counted by sorting them, and many with a single 'np.bincount' over 
+        all of 'flat'.
+        '''
+        if keys.size < flat.size // 8:
+            keys, values = np.unique(keys, return_counts=True)
+            flat[keys] += values.astype(self.dtype)
+        else:
+            flat += np.bincount(keys, minlength=flat.size).astype(self.dtype)
+
+
+    def _merge_sparse(self, keys, values):
+        '''
+        Adds 'values' to the sparse histograms at the flat bin indices 
+        'keys'.
+        '''
+        keys = np.concatenate((self._keys, keys))
+        values = np.concatenate((self._values, values.astype(self.dtype)))
+        if not keys.size:
+            return
+
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        values = values[order]
+
+        starts = np.flatnonzero(np.concatenate(([True], 
+            keys[1:] != keys[:-1])))
+        self._keys = keys[starts]
+        self._values = np.add.reduceat(values, starts)
+
+
+class EnergySpectrum:
+    '''
+    A histogram of event energies with fixed bins, built up from blocks of
+    events at a time. Only the counts in each bin are kept, so the memory 
+    it takes doesn't depend on the number of events. Spectra with the same
+    bins can be merged by adding them, so one spectrum can be built from 
+    events from several sources (e.g., chunks of a file, or several 
+    files).
+
+    Events are binned as by 'np.histogram(energies, bins=bins, 
+    range=energy_range)': bins include their lower edge, and the last bin 
+    also its upper edge.
+
+    Public Instance Attributes:
+        edges: numpy.ndarray
+            The edges of the bins, in keV.
+        counts: numpy.ndarray
+            The number of events in each bin, as 'int64'.
+
+    Private Instance Attributes:
+        _bins: int or numpy.ndarray
+            The 'bins' argument passed to 'np.histogram'. Uniform bins are
+            passed as a number of bins, which numpy bins faster.
+        _range: tuple of numbers
+            The 'range' argument passed to 'np.histogram'.
+    '''
+    def __init__(self, bins=10000, energy_range=(0.01, 120)):
+        '''
+        Keyword Arguments:
+            bins: int or array-like
+                The number of bins, which evenly divide 'energy_range', or 
+                the edges of the bins in keV.
+                (default: 10000)
+            energy_range: tuple of numbers
+                The bins will be made between these energies. Ignored if 
+                'bins' is an array of edges. Unlike for 'np.histogram', it 
+                can't be None with a number of bins: the bins are fixed 
+                before any events are added, so they can't be fit to the 
+                range of the events.
+                (default: (0.01, 120))
+        '''
+        if np.ndim(bins) == 0 and energy_range is None:
+            raise ValueError("'energy_range' is required with a number of "
+                + 'bins, since the bins are fixed before any events are '
+                + 'added. Pass the edges of the bins instead to leave it '
+                + 'out.')
+
+        self.edges = np.histogram_bin_edges([], bins=bins, 
+            range=energy_range)
+        self.counts = np.zeros(self.edges.size - 1, dtype=np.int64)
+
+        if np.ndim(bins) == 0:
+            self._bins, self._range = int(bins), tuple(energy_range)
+        else:
+            self._bins, self._range = self.edges, None
+
+
+    @property
+    def midpoints(self):
+        '''The middle energy of each bin, in keV.'''
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+
+    def add(self, energies):
+        '''Adds the events with energies 'energies' (in keV).'''
+        self.counts += np.histogram(energies, bins=self._bins, 
+            range=self._range)[0]
+
+
+    def merge(self, other):
+        '''
+        Adds the counts of 'other', another instance with the same bins, to
+        these. Returns this instance.
+        '''
+        if not np.array_equal(other.edges, self.edges):
+            raise ValueError('Spectra with different bins cannot be merged.')
+
+        self.counts += other.counts
+        return self
+
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+
+    def rebin(self, bins, energy_range=None):
+        '''
+        Returns a new 'EnergySpectrum' with coarser bins, derived from this
+        one by summing adjacent bins, without needing the events again.
+
+        Every edge of the new bins must line up with one of the edges of
+        these bins, since the events in a bin that an edge cut through 
+        could fall on either side of it. Edges that differ by less than a 
+        millionth of a bin width, e.g., through rounding when the same 
+        range is divided into different numbers of bins, line up. Events 
+        exactly at the upper edge of the new range are only counted if it 
+        is also the upper edge of these bins.
+
+        Arguments:
+            bins: int or array-like
+                The number of bins, which evenly divide 'energy_range', or 
+                the edges of the bins in keV.
+
+        Keyword Arguments:
+            energy_range: tuple of numbers
+                The bins will be made between these energies. If None, the
+                range of these bins is used.
+                (default: None)
 
-    start = np.argmax(mask)
-    end = len(mask) - np.argmax(mask[::-1])
-    del mask
+        Return:
+            spectrum: EnergySpectrum
+                The spectrum in the new bins.
+        '''
+        spectrum, indices = self._rebin_indices(bins, energy_range)
 
-    table.remove_rows(slice(0, start))
-    table.remove_rows(slice(end, col_length))
+        # The counts in each new bin, from the total counts below each edge
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        spectrum.counts = np.diff(cumulative[indices])
 
-    # Remove 'TEMP' and 'DET_ID' columns if they weren't requested.
-    table.remove_columns(colnames - original_colnames)
+        return spectrum
 
 
-    #
-    # Convert our data table to a pandas.DataFrame. DataFrames should be faster
-    # than astropy Tables for indexing/scalar value access.
-    #
+    def _rebin_indices(self, bins, energy_range=None):
+        '''
+        Returns an empty 'EnergySpectrum' with the bins 'bins' and 
+        'energy_range' (as in 'rebin'), along with the index of the edge of
+        these bins that each of its edges lines up with. Raises a 
+        ValueError if any of them doesn't line up, which only needs the 
+        edges, so it can be checked before any events are binned.
+        '''
+        if energy_range is None:
+            energy_range = (self.edges[0], self.edges[-1])
+        spectrum = EnergySpectrum(bins, energy_range)
 
-    # These lists will divide columns by their dimensionality. One dimensional
-    # columns (i.e, a column of scalars) can be converted directly to a pandas
-    # DataFrame via the 'to_pandas' method of astropy.table.Table. 
-    one_dim_col_names = []
-    two_dim_col_names = []
+        # The index of the edge of these bins nearest to each new edge
+        indices = np.clip(np.searchsorted(self.edges, spectrum.edges), 1, 
+            self.edges.size - 1)
+        nearer_below = spectrum.edges - self.edges[indices - 1] \
+            < self.edges[indices] - spectrum.edges
+        indices[nearer_below] -= 1
 
-    for colname in table.colnames:
-        if len(table[colname].shape) == 1:
-            one_dim_col_names.append(colname)
-        else:
-            two_dim_col_names.append(colname)
+        tolerance = 1e-6 * np.min(np.diff(self.edges))
+        if np.any(np.abs(self.edges[indices] - spectrum.edges) > tolerance):
+            raise ValueError('The edges of the new bins must line up with '
+                + 'edges of the bins of the spectrum.')
 
-    # If any one dimensional columns were requested, convert them all to a
-    # single pandas.DataFrame called 'one_dim_df'.
-    if one_dim_col_names:
-        one_dim_df = table[one_dim_col_names].to_pandas()
-        table.remove_columns(one_dim_col_names)
-    else:
-        one_dim_df = None
+        return spectrum, indices
 
-    # If any two dimensional columns were requested, convert them all to a
-    # dict of pandas.DataFrames, one DataFrame for
-    if two_dim_col_names:
-        dict_of_cols = table[two_dim_col_names].columns
-        two_dim_dfs = {}
-        for colname, col in dict_of_cols.items():
-            if swap_byte_order:
-                two_dim_dfs[colname] = pd.DataFrame(
-                    table[colname].data.byteswap().newbyteorder())
-            else:
-                two_dim_dfs[colname] = pd.DataFrame(table[colname].data)
-            table.remove_column(colname)
-    else:
-        two_dim_dfs = None
 
-    return one_dim_df, two_dim_dfs
+    def to_array(self):
+        '''
+        Returns the spectrum as a 2D numpy.ndarray, with the counts in each 
+        bin in row 0 and the middle energy of each bin in row 1, as 
+        returned by 'GammaFlood.gen_spectrum'.
+        '''
+        spectrum = np.empty((2, self.counts.size))
+        spectrum[0, :] = self.counts
+        spectrum[1, :] = self.midpoints
+        return spectrum
 
 
 ##
@@ -977,6 +2574,19 @@ class Experiment:
         num_caps: int
             The number of sampling capacitors mediating the pixel readout
             (default: 16)
+        cache_dir: str
+            Directory in which 'load_raw_data(cache=True)' caches the 
+            decoded columns of raw data files (see 'fits_to_df'). Each 
+            file, 'pos' and row window gets its own subdirectory holding a
+            full copy of its decoded columns, so the cache grows by about 
+            the size of the loaded data for each of them. Nothing is ever
+            evicted; to clear the cache, delete this directory.
+            (default: '~/.cache/nudetect')
+        pixel_index: PixelIndex
+            An index of the events in the raw data by pixel, set by 
+            'load_raw_data(index=True)', or None if the raw data is not 
+            indexed.
+            (default: None)
 
     Private Class Attributes:
         _full_det_shape: Tuple(int, int)
@@ -1064,6 +2674,12 @@ class Experiment:
     # The number of sampling capacitors mediating the pixel readout
     num_caps = 16
 
+    # Where decoded raw data columns are cached between runs
+    cache_dir = os.path.join(os.path.expanduser('~'), '.cache', 'nudetect')
+
+    # An index of the raw data by pixel, set by 'load_raw_data'
+    pixel_index = None
+
     def select_detector_region(self, start_col, start_row, end_col, end_row):
         '''
         Selects a region of the detector to be analyzed, if not the full
@@ -1178,6 +2794,105 @@ class Experiment:
         return info
 
 
+    def _region_index(self, rawx, rawy):
+        '''
+        A helper method for vectorized processing of event data. Given the
+        pixel coordinates 'rawx' and 'rawy' of some events, returns:
+            in_region: a boolean array, True for events in the analyzed
+                region of the detector.
+            maprow: the row of each event's pixel relative to the region
+            mapcol: the column of each event's pixel relative to the region
+        'maprow' and 'mapcol' are integer arrays that can index arrays of
+        shape '_det_shape' wherever 'in_region' is True.
+        '''
+        return _region_index(rawx, rawy, self._region())
+
+
+    def _region(self):
+        '''
+        Returns the (first row, first column, number of rows, number of 
+        columns) of the analyzed region, as the module-level block 
+        functions (e.g., '_count_block') take it.
+        '''
+        return (self._start_row, self._start_col, self._num_rows, 
+            self._num_cols)
+
+
+    def _compact_raw_data(self):
+        '''
+        Replaces the raw data loaded by 'load_raw_data' with an 
+        'EventTable' holding all of its columns. 'raw_data_1d' and 
+        'raw_data_2d' both refer to the new table, so methods can keep 
+        accessing columns from either by name.
+        '''
+        columns = {}
+        for raw_data in (self.raw_data_1d, self.raw_data_2d):
+            if raw_data is not None:
+                for colname in raw_data:
+                    columns[colname] = np.asarray(raw_data[colname])
+
+        self.raw_data_1d = self.raw_data_2d = EventTable(columns)
+
+
+    def _index_raw_data(self, index=False, by_cap=False):
+        '''
+        Sets 'self.pixel_index' to a 'PixelIndex' of the raw data loaded by
+        'load_raw_data', also keyed by starting capacitor if 'by_cap' is 
+        True, or to None if 'index' is False.
+        '''
+        self.pixel_index = None
+        if index:
+            self.pixel_index = PixelIndex(self.raw_data_1d['RAWX'], 
+                self.raw_data_1d['RAWY'], 
+                self.raw_data_1d['S_CAP'] if by_cap else None, 
+                num_caps=self.num_caps, det_shape=self._full_det_shape)
+
+
+    def pixel_events(self, row, col, start_cap=None):
+        '''
+        Returns the events in the raw data loaded by 'load_raw_data' at 
+        detector pixel ('row', 'col'), and with starting capacitor 
+        'start_cap' if it is not None. These are an array of indices from 
+        'self.pixel_index' if the raw data was indexed, which are grouped by
+        starting capacitor if the index is keyed by it, and otherwise a 
+        boolean mask. Either can index the raw data's columns as arrays, 
+        e.g.,
+
+        >>> np.asarray(noise.raw_data_2d['PH_RAW'])[noise.pixel_events(10, 11)]
+        '''
+        if self.pixel_index is not None:
+            return self.pixel_index.events(row, col, start_cap)
+
+        mask = (np.asarray(self.raw_data_1d['RAWX']) == col) \
+            & (np.asarray(self.raw_data_1d['RAWY']) == row)
+        if start_cap is not None:
+            mask &= np.asarray(self.raw_data_1d['S_CAP']) == start_cap
+
+        return mask
+
+
+    def _raw_data_blocks(self, colnames, block_size=1000000):
+        '''
+        Yields the columns 'colnames' of the raw data loaded by 
+        'load_raw_data' in consecutive blocks of at most 'block_size' 
+        events, as dicts of numpy arrays keyed by column name. These are 
+        views of the raw data, in the same form as the blocks yielded by 
+        'iter_raw_data', so the same vectorized code can process either 
+        while keeping its temporary arrays a bounded size.
+        '''
+        columns = {}
+        for colname in colnames:
+            if colname in self.raw_data_1d:
+                columns[colname] = np.asarray(self.raw_data_1d[colname])
+            else:
+                columns[colname] = np.asarray(self.raw_data_2d[colname])
+
+        num_events = len(next(iter(columns.values())))
+        for start in range(0, num_events, block_size):
+            yield {colname: col[start:start + block_size] 
+                for colname, col in columns.items()}
+
+
     #
     # Small helper methods: 'title' and '_set_save_dir'.
     #
@@ -1756,6 +3471,15 @@ class Noise(Experiment):
             A 32 x 32 array with the number of events collected during the 
             noise test at each corresponding pixel.
             (initialized to None)
+        cap_spectra: PixelHistograms
+            The noise spectrum of each starting capacitor and pixel of the 
+            analyzed region, with cells of shape (capacitors, rows, 
+            columns). It is accumulated by the first of 'gen_quick_noise' 
+            and 'gen_full_noise' to run, and reused by the other, so the 
+            events are only read once. It is accumulated again if the raw
+            data is reloaded, or if the raw data file, 'pos', the analyzed
+            region or 'sparse' change.
+            (initialized to None)
 
     Private attributes:
         _fwhm_map: 2D numpy.ndarray
@@ -1860,6 +3584,25 @@ class Noise(Experiment):
             If True, indicates that all processed data attributes have been
             corrected for gain. If False, then none of them have.
             (initialized to None)
+
+        _quick_gain_corrected, _full_gain_corrected: bool
+            Whether the quick noise maps ('_fwhm_map' and '_mean_map') and
+            the full noise maps ('_fwhm_maps' and '_mean_maps') are 
+            corrected for gain, tracked separately since either may be 
+            generated after the other. 'gain_correct_fwhm' only corrects 
+            those that aren't.
+            (initialized to None)
+
+        _cap_spectra_key: tuple
+            The raw data file, 'pos', detector region (see '_region') and 
+            'sparse' that 'cap_spectra' was accumulated with.
+            (initialized to None)
+
+        _quick_fit_key: tuple
+            The raw data file and 'pos' that '_quick_fit_data' was fit 
+            from, so that 'gen_full_noise' only warm-starts from quick fits
+            of the same data.
+            (initialized to None)
     '''
     def __init__(self, raw_data_path, detector, voltage, temp, pos=0, 
         gain=None, data_dir='', plot_dir='', save_dir='', etc=''):
@@ -1931,9 +3674,20 @@ class Noise(Experiment):
         # False when 'noise_map' is called, denoting whether the attribute
         # 'fwhm_map' is corrected for gain.
         self._gain_corrected = None
+        self._quick_gain_corrected = None
+        self._full_gain_corrected = None
         self.gain = gain
         self._fwhm_map = None
+        self._mean_map = None
+        self._fwhm_maps = None
+        self._mean_maps = None
+        self._quick_fit_data = None
+        self._quick_fit_key = None
+        self._full_fit_data = None
         self.count_map = None
+        self.count_maps = None
+        self.cap_spectra = None
+        self._cap_spectra_key = None
 
         self.raw_data = None
         self.raw_data_path = raw_data_path
@@ -1951,11 +3705,62 @@ class Noise(Experiment):
     # Methods for accessing private attributes
     #
 
-    def load_raw_data(self):
-        '''Loads raw data from FITS file into attributes of this instance.'''
+    def load_raw_data(self, cache=False, vector_format='dataframe', 
+        compact=False, index=False):
+        '''
+        Loads raw data from FITS file into attributes of this instance.
+
+        Keyword Arguments:
+            cache: bool
+                If True, the decoded columns are cached in (and on later 
+                calls, memory-mapped from) 'self.cache_dir'. The cache 
+                keeps a full copy of the decoded columns on disk; see 
+                'cache_dir'.
+                (default: False)
+            vector_format: str
+                The format of the two dimensional columns in 
+                'self.raw_data_2d', either 'dataframe' or 'numpy'. All 
+                methods accept either. 'numpy' skips wrapping each column 
+                in a DataFrame, so it takes less time and memory. See 
+                'fits_to_df'.
+                (default: 'dataframe')
+            compact: bool
+                If True, the raw data is stored in a single 'EventTable' 
+                with downcast dtypes and bit-packed flags, which both
+                'self.raw_data_1d' and 'self.raw_data_2d' refer to. This 
+                uses less memory per event.
+                (default: False)
+            index: bool
+                If True, the events are indexed by pixel in 
+                'self.pixel_index' (see 'PixelIndex'), so that 
+                'pixel_events' can look up the events at each pixel without
+                scanning all of them. This is worth its one sort over the 
+                events when looking up many single pixels. The 'gen_*' 
+                methods bin all pixels at once and don't use it.
+                (default: False)
+        '''
+        # Spectra accumulated from previously loaded data are out of date.
+        self.cap_spectra = None
+        self._cap_spectra_key = None
+
+        cache_dir = self.cache_dir if cache else None
         self.raw_data_1d, self.raw_data_2d = fits_to_df(self.raw_data_path,
             colnames={'RAWX', 'RAWY', 'PH_RAW', 'UP', 'S_CAP'},
-            pos=self.pos)
+            pos=self.pos, cache_dir=cache_dir, vector_format=vector_format)
+        if compact:
+            self._compact_raw_data()
+        self._index_raw_data(index, by_cap=True)
+
+
+    def iter_raw_data(self, chunk_size=1000000, 
+        colnames={'RAWX', 'RAWY', 'PH_RAW', 'UP', 'S_CAP'}):
+        '''
+        Yields blocks of at most 'chunk_size' events from the FITS file as
+        dicts of numpy arrays keyed by column name, without loading the 
+        whole file. See 'iter_fits_chunks' for details.
+        '''
+        return iter_fits_chunks(self.raw_data_path, colnames, pos=self.pos,
+            chunk_size=chunk_size)
 
 
     def load_fwhm_map(self, fwhm_map, gain_corrected=None):
@@ -2002,6 +3807,7 @@ class Noise(Experiment):
                 "is. Mixing the two is not allowed.")
  
         self._gain_corrected = gain_corrected
+        self._quick_gain_corrected = gain_corrected
 
         fwhm_map = np.loadtxt(fwhm_map)
 
@@ -2041,6 +3847,7 @@ class Noise(Experiment):
                 + f"{type(gain_corrected)} was given.")
 
         self._gain_corrected = gain_corrected
+        self._quick_gain_corrected = gain_corrected
 
         if fwhm_map.shape != self._det_shape and \
            fwhm_map.shape != self._full_det_shape:
@@ -2095,6 +3902,7 @@ class Noise(Experiment):
                 + f"{type(gain_corrected)} was given.")
  
         self._gain_corrected = gain_corrected
+        self._quick_gain_corrected = gain_corrected
 
         mean_map = np.loadtxt(mean_map)
 
@@ -2134,6 +3942,7 @@ class Noise(Experiment):
                 + f"{type(gain_corrected)} was given.")
 
         self._gain_corrected = gain_corrected
+        self._quick_gain_corrected = gain_corrected
 
         if mean_map.shape != self._det_shape and \
            mean_map.shape != self._full_det_shape:
@@ -2169,7 +3978,8 @@ class Noise(Experiment):
 
     def gen_quick_noise(self, gain=None, save_plot=True, plot_dir='', 
         plot_subdir='', plot_ext='.pdf', save_data=True, data_dir='', 
-        data_subdir='', data_ext='.txt'):
+        data_subdir='', data_ext='.txt', chunk_size=None, 
+        fit_method='levmar', n_jobs=1, sparse=False):
         '''
         For each combination of pixel coordinates and starting capacitor,
         plots a spectrum of the noise and fits it with a Gaussian. The 
@@ -2230,6 +4040,31 @@ class Noise(Experiment):
             data_ext: str
                 The file name extension for the noise map data files. 
                 (default: '.txt')
+            chunk_size: int
+                If None, the event data loaded by 'load_raw_data' is used.
+                Otherwise, events are streamed from the FITS file in blocks
+                of at most this many events (see 'iter_raw_data'), so the
+                raw data never has to fit in memory. It has no effect if 
+                'cap_spectra' is reused.
+                (default: None)
+            fit_method: str
+                How the Gaussians are fit to the pixel spectra: 'levmar' 
+                fits them one at a time with astropy's 'LevMarLSQFitter', 
+                and 'batch' fits all of them at once, which is much faster. 
+                'moments' and 'log-parabola' are faster still closed-form 
+                estimates, meant for quick checks of spectra with many 
+                counts. See 'fit_gaussians'.
+                (default: 'levmar')
+            n_jobs: int
+                The number of processes to spread the fits across, or -1 
+                for one per CPU. The results don't depend on it. See 
+                'fit_gaussians'.
+                (default: 1)
+            sparse: bool
+                If True, the per-pixel spectra are accumulated sparsely, 
+                which takes less memory when most channels are empty. See 
+                'PixelHistograms'.
+                (default: False)
 
         Return:
             fit_data: pandas.DataFrame
@@ -2303,9 +4138,6 @@ class Noise(Experiment):
         if not self.full_detector and gain.shape == self._full_det_shape:
             gain = gain[self._row_slice, self._col_slice]
 
-        maxchannel = 1000
-        bins = np.arange(-maxchannel, maxchannel)
-
         # Shape of the arrays of processed data. For NuSTAR style detectors, 
         # should be (32, 32).
         output_shape = (self._num_rows, self._num_cols)
@@ -2317,9 +4149,6 @@ class Noise(Experiment):
         fwhm_map = np.full(output_shape, np.nan)
         # Initilaizing pixel map of centroid values
         mean_map = np.full(output_shape, np.nan)
-        # Initializing pixel map of counts
-        count_map = np.empty(output_shape)
-
         # Initializing a DataFrame to store information about how the 
         # fitting went for each pixel.
         index = pd.MultiIndex.from_product([self._row_iter, self._col_iter],
@@ -2327,116 +4156,29 @@ class Noise(Experiment):
 
         columns = ['mean', 'mean error', 'fwhm', 'fwhm error']
 
-        fit_data = pd.DataFrame(
-            np.empty((np.prod(output_shape), len(columns))),
-            columns=columns, index=index)
-
-        # Generate 'chan_map', a nested list representing an array 
-        # of lists, each of which contains all the trigger readings for 
-        # its corresponding pixel. A buffer is added on two of the sides 
-        # because the raw data contains dummy values representing the 
-        # imaginary pixels in the 3 x 3 grid surroudning a pixel on a
-        # detector edge whose readout was triggered.
-        chan_map = [[[] 
-            for col in range(self._num_cols + 2)] 
-            for row in range(self._num_rows + 2)]
-
-        ph_raw = self.raw_data_2d['PH_RAW']
-
-        # Iterating through pixels
-        for col in self._col_iter:
-            col_mask = self.raw_data_1d.loc[:, 'RAWX'] == col
-            for row in self._row_iter:
-                row_mask = self.raw_data_1d.loc[:, 'RAWY'] == row
-                # Storing all readings for the current pixel in 'pulses'.
-                pixel_mask = (col_mask) & (row_mask)
-                pulses = ph_raw.loc[pixel_mask]
-                for i in pulses.index:
-                    # If this pulse was triggered by the experiment (by a 
-                    # 'micro pulse'), then add the pulse data for the 3 x 3
-                    # pixel grid centered on the triggered pixel to the 
-                    # corresponding indices of 'chan_map'.
-                    if self.raw_data_1d.at[i, 'UP']:
-                        for j in range(9):
-                            mapcol = (col - self._start_col) + (j % 3) - 1
-                            maprow = (row - self._start_row) + (j // 3) - 1
-                            chan_map[maprow][mapcol].append(pulses.at[i, j])
-
-        del pulses, pixel_mask, col_mask, row_mask
-
-        # Generate a count map of micropulse-triggered events from 
-        # 'chan_map'.
-        count_map = np.array([[len(chan_map[row][col]) 
-            for col in range(1, self._num_cols + 1)] 
-            for row in range(1, self._num_rows + 1)])
-       
+        # The fit information is collected in an array with a row for each 
+        # entry of 'index', and made into a DataFrame once all of the fits 
+        # are done. Rows of pixels that aren't fit are left as nan.
+        fit_values = np.full((np.prod(output_shape), len(columns)), np.nan)
+
+        # 'spectra' holds the noise spectrum of each pixel and the number of
+        # readings at each pixel. The spectrum of a pixel is the sum of its 
+        # spectra for each starting capacitor, so it is collapsed from 
+        # 'cap_spectra', which is accumulated first if it hasn't been yet.
+        spectra = self._gen_cap_spectra(chunk_size=chunk_size, 
+            sparse=sparse).sum(axis=0)
+
+        count_map = spectra.counts.astype(int)
+
         # Generate a fwhm map of noise, and plot the gaussian fit to each 
         # pixel's spectrum.
-        
-        # Iterate through elements of chan_map
-        for row in self._row_iter:
-            for col in self._col_iter:
-                maprow = row - self._start_row
-                mapcol = col - self._start_col
-                # If there were events at this pixel, bin them by channel
-                if chan_map[maprow][mapcol]:
-                    # Binning events by channel
-                    spectrum, edges = np.histogram(chan_map[maprow][mapcol], 
-                        bins=bins, range=(-maxchannel, maxchannel))
-
-                    # Fitting the noise peak at/near zero channels
-                    fit_channels = edges[:-1]
-                    g_init = models.Gaussian1D(amplitude=np.max(spectrum), 
-                        mean=0, stddev=75)
-                    fit_g = fitting.LevMarLSQFitter()
-                    g = fit_g(g_init, fit_channels, spectrum)
-
-                    # Recording the gain-corrected FWHM and mean data
-                    # for this pixel in the corresponding arrays.
-                    fwhm_map[maprow, mapcol] = np.multiply(
-                        g.fwhm, gain[maprow, mapcol])
-
-                    mean_map[maprow, mapcol] = np.multiply(
-                        g.mean, gain[maprow, mapcol])
-
-                    # If the fit succeeded, record some of the fit information
-                    # in the 'fit_data' DataFrame.
-                    if fit_g.fit_info['param_cov'] is not None:
-                        # 1 stardard deviation error for Gaussian parameters.
-                        sigma_err = np.diag(fit_g.fit_info['param_cov'])[2]
-                        fwhm_err = 2 * np.sqrt(2 * np.log(2)) * sigma_err
-                        mean_err = np.diag(fit_g.fit_info['param_cov'])[1]
-
-                        # Populating a row of fit_data with fit information
-                        df_row = [g.mean.value, mean_err, g.fwhm, fwhm_err]
-                        fit_data.loc[(row, col)] = df_row
-                    else:
-                        df_row = [g.mean.value, np.nan, g.fwhm, np.nan]
-                        fit_data.loc[(row, col)] = df_row
-
-                    if save_plot:
-                        plt.hist(np.multiply(
-                                chan_map[maprow][mapcol], 
-                                gain[maprow, mapcol]),
-                            bins=np.multiply(bins, gain[maprow, mapcol]), 
-                            range=(-maxchannel * gain[maprow, mapcol], 
-                                    maxchannel * gain[maprow, mapcol]), 
-                            histtype='stepfilled')
-
-                        plt.plot(np.multiply(
-                            fit_channels, gain[maprow, mapcol]), 
-                            g(fit_channels))
-
-                        plt.ylabel('Counts')
-                        if gain_bool:
-                            plt.xlabel('Energy (keV)')
-                        else:
-                            plt.xlabel('Channel')
-
-                        plt.tight_layout()
-                        plt.savefig(plot_path.format(row, col))
-                        plt.close()
-        
+        self._fit_noise_spectra(spectra, gain, fwhm_map, mean_map, 
+            fit_values, gain_bool=gain_bool, 
+            plot_path=(plot_path if save_plot else None), 
+            fit_method=fit_method, n_jobs=n_jobs)
+        del spectra
+
+        fit_data = pd.DataFrame(fit_values, columns=columns, index=index)
 
         # Mask large values, taking into account whether fwhm is in units
         # of channels or of keV.
@@ -2449,9 +4191,11 @@ class Noise(Experiment):
         self._mean_map = mean_map
         self.count_map = count_map
         self._quick_fit_data = fit_data
+        self._quick_fit_key = (self.raw_data_path, self.pos)
         # Set '_gain_corrected' way down here to make sure the maps of 
         # FWHM and mean were successfully generated.
         self._gain_corrected = gain_bool
+        self._quick_gain_corrected = gain_bool
 
         if save_data:
             np.savetxt(fwhm_path, fwhm_map)
@@ -2464,7 +4208,8 @@ class Noise(Experiment):
 
     def gen_full_noise(self, gain=None, save_plot=False, plot_dir='', 
         plot_subdir='', plot_ext='.pdf', save_data=True, data_dir='', 
-        data_subdir=''):
+        data_subdir='', chunk_size=None, fit_method='levmar', n_jobs=1,
+        sparse=False, warm_start=True, fit_window=5):
         '''
         For each combination of pixel coordinates and starting capacitor,
         plots a spectrum of the noise and fits it with a Gaussian. The 
@@ -2522,6 +4267,44 @@ class Noise(Experiment):
                 be saved. Empty curly braces '{}' are formatted the same way
                 as in 'data_dir'. 
                 (default: '')
+            chunk_size: int
+                If None, the event data loaded by 'load_raw_data' is used.
+                Otherwise, events are streamed from the FITS file in blocks
+                of at most this many events (see 'iter_raw_data'), so the
+                raw data never has to fit in memory. It has no effect if 
+                'cap_spectra' is reused.
+                (default: None)
+            fit_method: str
+                How the Gaussians are fit to the pixel spectra: 'levmar' 
+                fits them one at a time with astropy's 'LevMarLSQFitter', 
+                and 'batch' fits all of them at once, which is much faster. 
+                'moments' and 'log-parabola' are faster still closed-form 
+                estimates, meant for quick checks of spectra with many 
+                counts. See 'fit_gaussians'.
+                (default: 'levmar')
+            n_jobs: int
+                The number of processes to spread the fits across, or -1 
+                for one per CPU. The results don't depend on it. See 
+                'fit_gaussians'.
+                (default: 1)
+            sparse: bool
+                If True, the per-pixel spectra are accumulated sparsely, 
+                which takes less memory when most channels are empty. See 
+                'PixelHistograms'.
+                (default: False)
+            warm_start: bool
+                If True and 'gen_quick_noise' has been run on the same raw 
+                data file and 'pos', the fit for each pixel and starting 
+                capacitor starts from the mean and standard deviation of 
+                the pixel's quick noise fit, and is only done within 
+                'fit_window' standard deviations of the mean. Pixels whose 
+                quick fit failed are fit from the usual initial guesses 
+                over all channels.
+                (default: True)
+            fit_window: float
+                The half-width of the warm-started fitting windows, in 
+                units of the quick noise standard deviation.
+                (default: 5)
 
         Return:
             fit_data: pandas.DataFrame
@@ -2603,9 +4386,6 @@ class Noise(Experiment):
         if not self.full_detector and gain.shape == self._full_det_shape:
             gain = gain[self._row_slice, self._col_slice]
 
-        maxchannel = 1000
-        bins = np.arange(-maxchannel, maxchannel)
-
         # Shape of the arrays of processed data. For NuSTAR style detectors, 
         # should be (16, 32, 32) for number of sampling capacitors along the 
         # 0th axis and the detector dimensions along the 1st and 2nd axes.
@@ -2620,9 +4400,6 @@ class Noise(Experiment):
         # Initilaizing map of centroid values for the noise gaussian at each 
         # pixel and starting capacitor.
         mean_maps = np.full(output_shape, np.nan)
-        # Initializing map of counts at each pixel and starting capacitor.
-        count_maps = np.empty(output_shape)
-
         # Capacitor indices
         cap_inds = range(self.num_caps)
         # Pixel row indices
@@ -2637,124 +4414,45 @@ class Noise(Experiment):
 
         columns = ['mean', 'mean error', 'fwhm', 'fwhm error']
 
-        fit_data = pd.DataFrame(
-            np.empty((np.prod(output_shape), len(columns))),
-            columns=columns, index=index)
-
-        ph_raw = self.raw_data_2d['PH_RAW']
-
-        # Iterating through starting capacitor values
-        for start_cap in range(self.num_caps):
-            start_cap_mask = self.raw_data_1d.loc[:, 'S_CAP'] == start_cap
-            # Generate 'chan_map', a nested list representing an array 
-            # of lists, each of which contains all the trigger readings for 
-            # its corresponding pixel. A buffer is added on two of the sides 
-            # because the raw data contains dummy values representing the 
-            # imaginary pixels in the 3 x 3 grid surroudning a pixel on a
-            # detector edge whose readout was triggered.
-            chan_map = [[[] 
-                for col in range(self._num_cols + 2)] 
-                for row in range(self._num_rows + 2)]
-
-            # Iterating through pixels
-            for col in self._col_iter:
-                col_mask = self.raw_data_1d.loc[:, 'RAWX'] == col
-                for row in self._row_iter:
-                    row_mask = self.raw_data_1d.loc[:, 'RAWY'] == row
-                    # Storing all readings for the current pixel in 'pulses'.
-                    mask = (col_mask) & (row_mask) & (start_cap_mask)
-                    pulses = ph_raw.loc[mask]
-                    for i in pulses.index:
-                        # If this pulse was triggered by the experiment (by a 
-                        # 'micro pulse'), then add the pulse data for the 3 x 3
-                        # pixel grid centered on the triggered pixel to the 
-                        # corresponding indices of 'chan_map'.
-                        if self.raw_data_1d.at[i, 'UP']:
-                            for j in range(9):
-                                mapcol = (col - self._start_col) + (j % 3) - 1
-                                maprow = (row - self._start_row) + (j // 3) - 1
-                                chan_map[maprow][mapcol].append(
-                                    pulses.at[i, j])
-
-            del pulses, mask, row_mask, col_mask, start_cap_mask
-
-            # Generate a count map of micropulse-triggered events from 
-            # 'chan_map' and insert it into the appropriate slice of the 
-            # 'count_maps' array
-            count_map = np.array([[len(chan_map[row][col]) 
-                for col in range(self._num_cols)] 
-                for row in range(self._num_rows)])
-            count_maps[start_cap] = count_map
-           
-            # Generate a fwhm map of noise, and plot the gaussian fit to each 
-            # pixel's spectrum.
-            
-            # Iterate through pixels
-            for row in self._row_iter:
-                for col in self._col_iter:
-                    maprow = row - self._start_row
-                    mapcol = col - self._start_col
-                    # If there were events at this pixel, bin them by channel
-                    if chan_map[maprow][mapcol]:
-                        # Binning events by channel
-                        spectrum, edges = np.histogram(
-                            chan_map[maprow][mapcol], 
-                            bins=bins, range=(-maxchannel, maxchannel))
-
-                        # Fitting the noise peak at/near zero channels
-                        fit_channels = edges[:-1]
-                        g_init = models.Gaussian1D(amplitude=np.max(spectrum), 
-                            mean=0, stddev=75)
-                        fit_g = fitting.LevMarLSQFitter()
-                        g = fit_g(g_init, fit_channels, spectrum)
-
-                        # Recording the gain-corrected FWHM and mean data
-                        # for this pixel and starting capacitor in the
-                        # corresponding arrays.
-                        fwhm_maps[start_cap, maprow, mapcol] = np.multiply(
-                            g.fwhm, gain[maprow, mapcol])
-
-                        mean_maps[start_cap, maprow, mapcol] = np.multiply(
-                            g.mean, gain[maprow, mapcol])
-
-                        # If the fit succeeded, record some of the fit 
-                        # information in the 'fit_data' DataFrame.
-                        if fit_g.fit_info['param_cov'] is not None:
-                            # 1 stardard deviation error for Gaussian 
-                            # parameters.
-                            sigma_err = np.diag(fit_g.fit_info['param_cov'])[2]
-                            fwhm_err = 2 * np.sqrt(2 * np.log(2)) * sigma_err
-                            mean_err = np.diag(fit_g.fit_info['param_cov'])[1]
-
-                            # Populating a row of fit_data with fit information
-                            df_row = [g.mean.value, mean_err, g.fwhm, fwhm_err]
-                            fit_data.loc[(start_cap, row, col)] = df_row
-                        else:
-                            df_row = [g.mean.value, np.nan, g.fwhm, np.nan]
-                            fit_data.loc[(start_cap, row, col)] = df_row
-
-                        if save_plot:
-                            plt.hist(np.multiply(
-                                    chan_map[maprow][mapcol], 
-                                    gain[maprow, mapcol]),
-                                bins=np.multiply(bins, gain[maprow, mapcol]), 
-                                range=(-maxchannel * gain[maprow, mapcol], 
-                                        maxchannel * gain[maprow, mapcol]), 
-                                histtype='stepfilled')
-
-                            plt.plot(np.multiply(fit_channels, 
-                                gain[maprow, mapcol]), g(fit_channels))
-
-                            plt.ylabel('Counts')
-                            if gain_bool:
-                                plt.xlabel('Energy (keV)')
-                            else:
-                                plt.xlabel('Channel')
-
-                            plt.tight_layout()
-                            plt.savefig(plot_path.format(row, col, start_cap))
-                            plt.close()
-        
+        # The fit information is collected in an array with a row for each 
+        # entry of 'index', and made into a DataFrame once all of the fits 
+        # are done. Rows of pixels that aren't fit are left as nan.
+        fit_values = np.full((np.prod(output_shape), len(columns)), np.nan)
+
+        # The spectra and counts of each starting capacitor and pixel, 
+        # reused if 'gen_quick_noise' already accumulated them.
+        spectra_caps = self._gen_cap_spectra(chunk_size=chunk_size, 
+            sparse=sparse)
+
+        # Map of counts at each pixel and starting capacitor.
+        count_maps = spectra_caps.counts.astype(float)
+
+        # Seeding the fits with the quick noise fits of the same pixels, 
+        # where they succeeded. 'fit_data' stays in units of channels, even
+        # if the quick noise maps were gain corrected. Quick fits of other
+        # raw data would center the fitting windows on the wrong peaks.
+        seeds = None
+        if warm_start and self._quick_fit_data is not None \
+            and self._quick_fit_key == (self.raw_data_path, self.pos):
+            quick = self._quick_fit_data.reindex(
+                pd.MultiIndex.from_product([row_inds, col_inds]))
+            good = np.isfinite(quick['fwhm error'].values)
+            seed_mean = np.where(good, quick['mean'].values, np.nan)
+            seed_stddev = np.where(good, quick['fwhm'].values, np.nan) \
+                / (2 * np.sqrt(2 * np.log(2)))
+            seeds = (seed_mean.reshape(self._det_shape), 
+                seed_stddev.reshape(self._det_shape))
+
+        # Generate fwhm maps of noise for every starting capacitor, and plot
+        # the gaussian fit to each pixel's spectrum.
+        self._fit_noise_spectra(spectra_caps, gain, fwhm_maps, mean_maps, 
+            fit_values, gain_bool=gain_bool, 
+            plot_path=(plot_path if save_plot else None), 
+            fit_method=fit_method, n_jobs=n_jobs, seeds=seeds, 
+            fit_window=fit_window)
+        del spectra_caps
+
+        fit_data = pd.DataFrame(fit_values, columns=columns, index=index)
 
         # Mask large values, taking into account whether fwhm is in units
         # of channels or of keV.
@@ -2770,6 +4468,7 @@ class Noise(Experiment):
         # Set '_gain_corrected' way down here to make sure the maps of 
         # FWHM and mean were successfully generated.
         self._gain_corrected = gain_bool
+        self._full_gain_corrected = gain_bool
 
         if save_data:
             # We can't save the array mask because the feature isn't 
@@ -2784,13 +4483,356 @@ class Noise(Experiment):
         return fit_data
 
 
+    #
+    # Helper methods for 'gen_quick_noise' and 'gen_full_noise': 
+    # '_gen_cap_spectra', '_noise_block' and '_fit_noise_spectra'.
+    #
+
+    def _gen_cap_spectra(self, chunk_size=None, sparse=False):
+        '''
+        Returns 'cap_spectra', the noise spectrum of each starting capacitor
+        and pixel of the analyzed region. If it hasn't been accumulated for
+        this raw data, region and 'sparse' yet, it is, in a single pass over
+        the events: each block is read in memory, or from the FITS file in 
+        chunks of 'chunk_size' rows if it is not None, and its readings are
+        binned with '_noise_block'. 'sparse' is passed to 
+        'PixelHistograms'.
+        '''
+        key = (self.raw_data_path, self.pos, self._region(), sparse)
+        if self.cap_spectra is not None and self._cap_spectra_key == key:
+            return self.cap_spectra
+
+        # Unit-width bins with edges from -1000 to 999
+        maxchannel = 1000
+        spectra = PixelHistograms((self.num_caps,) + self._det_shape, 
+            -maxchannel, maxchannel - 1, sparse=sparse)
+
+        colnames = {'RAWX', 'RAWY', 'PH_RAW', 'UP', 'S_CAP'}
+        if chunk_size is None:
+            blocks = self._raw_data_blocks(colnames)
+        else:
+            blocks = self.iter_raw_data(chunk_size, colnames=colnames)
+
+        for block in blocks:
+            spectra.add(*self._noise_block(block, by_cap=True))
+
+        self.cap_spectra = spectra
+        self._cap_spectra_key = key
+        return spectra
+
+
+    def _noise_block(self, block, by_cap=False):
+        '''
+        Gathers the 'PH_RAW' readings of the micropulse-triggered ('UP') 
+        events in 'block', a dict of arrays of event data as yielded by 
+        'iter_raw_data' or '_raw_data_blocks'. Each of the 9 readings of an
+        event is assigned to its pixel in the 3 x 3 grid centered on the 
+        triggered pixel, and readings of pixels outside the analyzed region 
+        are dropped.
+
+        Arguments:
+            block: dict of numpy.ndarray
+                A block of event data.
+
+        Keyword Arguments:
+            by_cap: bool
+                If True, events are also separated by starting capacitor 
+                ('S_CAP').
+                (default: False)
+
+        Return:
+            pixels: numpy.ndarray
+                The flat index of the pixel of each reading in an array of 
+                shape (rows, columns), or of the starting capacitor and 
+                pixel in an array of shape (capacitors, rows, columns) if 
+                'by_cap' is True. These are the cells of a 'PixelHistograms'.
+            channels: numpy.ndarray
+                The channel of each reading.
+        '''
+        up = np.asarray(block['UP'], dtype=bool)
+        in_region, maprow, mapcol = self._region_index(block['RAWX'][up], 
+            block['RAWY'][up])
+
+        maprow = maprow[in_region]
+        mapcol = mapcol[in_region]
+        ph_raw = block['PH_RAW'][up][in_region]
+
+        # The pixel of each of the 9 readings of each event, ordered like 
+        # PH_RAW.
+        grid_rows = maprow[:, np.newaxis] + np.arange(9) // 3 - 1
+        grid_cols = mapcol[:, np.newaxis] + np.arange(9) % 3 - 1
+        pixels = grid_rows * self._num_cols + grid_cols
+
+        if by_cap:
+            cap = block['S_CAP'][up][in_region].astype(np.intp)
+            pixels += cap[:, np.newaxis] * self._num_rows * self._num_cols
+
+        # Dropping readings of pixels outside of the region
+        valid = (grid_rows >= 0) & (grid_rows < self._num_rows) \
+            & (grid_cols >= 0) & (grid_cols < self._num_cols)
+
+        return pixels[valid], ph_raw[valid]
+
+
+    def _fit_noise_spectra(self, spectra, gain, fwhm_map, mean_map, 
+        fit_values, gain_bool=False, plot_path=None, fit_method='levmar', 
+        n_jobs=1, seeds=None, fit_window=5):
+        '''
+        Fits a Gaussian to the noise peak in the spectrum of each pixel of 
+        the analyzed region with any counts. The gain-corrected FWHM and mean
+        of each fit are written into 'fwhm_map' and 'mean_map', and the 
+        mean, mean error, FWHM and FWHM error in channels into the row of 
+        'fit_values' at the pixel's flat index in 'fwhm_map'. Rows of 
+        failed fits get nan errors.
+
+        'spectra' is a 'PixelHistograms' with cells of shape (rows, 
+        columns). It may also have a leading axis for the starting 
+        capacitor, in which case 'fwhm_map' and 'mean_map' have one too. 
+        All of the spectra are fit with 'fit_gaussians', with 'fit_method' 
+        and 'n_jobs', and their results are recorded with a few array 
+        assignments.
+
+        Fits start from a mean of 0 and a standard deviation of 75 
+        channels, over all channels. If 'seeds' is not None, it is a tuple 
+        of arrays (mean, stddev) in channels, broadcastable to the shape of
+        the cells of 'spectra', and pixels with a finite seed instead start
+        from it and are only fit within 'fit_window' seed standard 
+        deviations of the seed mean.
+
+        If 'plot_path' is supplied, the spectrum and fit of each pixel are
+        plotted and saved to 'plot_path' formatted with the pixel column, 
+        row, and starting capacitor (or None).
+        '''
+        # Fitting the noise peak at/near zero channels
+        bins = spectra.bins
+        fit_channels = bins[:-1]
+
+        # Only fit pixels with events.
+        pixels = np.nonzero(spectra.counts)
+        pixel_spectra = spectra.spectra(pixels)
+        num_fits = len(pixel_spectra)
+        amplitude = np.max(pixel_spectra, axis=1, initial=0)
+
+        mean = np.zeros(num_fits)
+        stddev = np.full(num_fits, 75.0)
+        seeded = np.zeros(num_fits, dtype=bool)
+        if seeds is not None:
+            seed_mean, seed_stddev = (np.broadcast_to(seed, spectra.shape)[
+                pixels] for seed in seeds)
+            seeded = np.isfinite(seed_mean) & np.isfinite(seed_stddev) \
+                & (seed_stddev > 0) & (seed_mean >= bins[0]) \
+                & (seed_mean < bins[-1])
+            mean[seeded] = seed_mean[seeded]
+            stddev[seeded] = seed_stddev[seeded]
+
+        params = np.empty((num_fits, 3))
+        cov = np.empty((num_fits, 3, 3))
+        converged = np.empty(num_fits, dtype=bool)
+
+        # Unseeded spectra are fit over all channels, all at once.
+        fit = ~seeded
+        params[fit], cov[fit], converged[fit] = fit_gaussians(fit_channels,
+            pixel_spectra[fit], amplitude[fit], mean[fit], stddev[fit], 
+            method=fit_method, n_jobs=n_jobs)
+
+        # Seeded spectra are fit within windows of the same width around 
+        # their seeds, clipped to the channel range, also all at once.
+        if np.any(seeded):
+            half_width = int(np.ceil(fit_window * np.max(stddev[seeded])))
+            width = min(2 * half_width + 1, len(fit_channels))
+            starts = np.clip(np.round(mean[seeded]).astype(int) - bins[0] 
+                - half_width, 0, len(fit_channels) - width)
+            windows = starts[:, np.newaxis] + np.arange(width)
+
+            params[seeded], cov[seeded], converged[seeded] = fit_gaussians(
+                fit_channels[windows], 
+                np.take_along_axis(pixel_spectra[seeded], windows, axis=1),
+                amplitude[seeded], mean[seeded], stddev[seeded], 
+                method=fit_method, n_jobs=n_jobs)
+
+        # Recording the gain-corrected FWHM and mean data for the fit pixels
+        # in the corresponding arrays.
+        sigma_to_fwhm = 2 * np.sqrt(2 * np.log(2))
+        pixel_gain = gain[pixels[-2], pixels[-1]]
+        fwhm = params[:, 2] * sigma_to_fwhm
+        fwhm_map[pixels] = np.multiply(fwhm, pixel_gain)
+        mean_map[pixels] = np.multiply(params[:, 1], pixel_gain)
+
+        # Recording the fit information. The errors are the diagonals of 
+        # the covariance matrices, where the fits succeeded.
+        variances = np.diagonal(cov, axis1=1, axis2=2)
+        rows = np.ravel_multi_index(pixels, fwhm_map.shape)
+        fit_values[rows, 0] = params[:, 1]
+        fit_values[rows, 1] = np.where(converged, variances[:, 1], np.nan)
+        fit_values[rows, 2] = fwhm
+        fit_values[rows, 3] = np.where(converged, 
+            sigma_to_fwhm * variances[:, 2], np.nan)
+
+        if plot_path is None:
+            return
+
+        # Plotting the spectrum and fit of each fit pixel
+        for i, pixel in enumerate(zip(*pixels)):
+            if len(pixel) == 3:
+                start_cap, maprow, mapcol = pixel
+            else:
+                start_cap = None
+                maprow, mapcol = pixel
+            row = maprow + self._start_row
+            col = mapcol + self._start_col
+
+            spectrum = pixel_spectra[i]
+            g = models.Gaussian1D(*params[i])
+
+            # The spectrum is already binned, so each bin is drawn 
+            # as a single weighted entry.
+            plt.hist(np.multiply(fit_channels, gain[maprow, mapcol]),
+                bins=np.multiply(bins, gain[maprow, mapcol]), 
+                weights=spectrum, histtype='stepfilled')
+
+            plt.plot(np.multiply(
+                fit_channels, gain[maprow, mapcol]), 
+                g(fit_channels))
+
+            plt.ylabel('Counts')
+            if gain_bool:
+                plt.xlabel('Energy (keV)')
+            else:
+                plt.xlabel('Channel')
+
+            plt.tight_layout()
+            plt.savefig(plot_path.format(row, col, start_cap))
+            plt.close()
+
+
     def gain_correct_fwhm(self, gain=None, save_data=True, data_dir='', 
         data_subdir='', data_ext='.txt'):
         '''
         Apply gain corrections to processed noise data, if generated without 
-        gain correction.
+        gain correction. The FWHM and mean maps from 'gen_quick_noise' and 
+        'gen_full_noise' (or set with 'load_fwhm_map', etc.) are multiplied
+        by each pixel's gain, giving the maps those methods would have given
+        with 'gain', without reading any events or redoing any fits. As 
+        there, the FWHM maps are masked with the threshold for keV, and 
+        the fit information in 'fit_data' stays in units of channels. Maps
+        that are already corrected for gain, e.g., the quick noise maps 
+        after 'gen_quick_noise(gain=...)', are left as they are.
+
+        Keyword Arguments:
+            gain: 2D numpy.ndarray
+                An array of floats with the gain of each pixel of the 
+                analyzed region or of the full detector, where channels * 
+                gain = energy. Masked pixels are masked in the corrected 
+                maps. If None, defaults to the array in 'self.gain'.
+                (default: None)
+            save_data: bool 
+                If True, saves the gain-corrected maps, along with the count
+                maps and fit data, to the files that 'gen_quick_noise' and 
+                'gen_full_noise' would have saved them to.
+                (default: True)
+            data_dir: str
+                The directory to which the files will be saved, overriding 
+                any path specified in the 'save_dir' attribute. If an empty 
+                string, will default to the attribute 'save_dir'.
+                If the string passed to 'data_dir' has an empty pair of curly 
+                braces '{}', they will be replaced by the detector ID 
+                'self.detector'. For example, if self.detector == 'H100' and 
+                data_dir == 'figures/{}/pixels', then the directory that 
+                'save_path' points to is 'figures/H100/pixels'.
+                (default: '')
+            data_subdir: str
+                A path to a sub-directory of 'data_dir' to which the files 
+                will be saved. Empty curly braces '{}' are formatted the same
+                way as in 'data_dir'. 
+                (default: '')
+            data_ext: str
+                The file name extension for the quick noise map data files. 
+                The full noise maps are saved as '.npy' files.
+                (default: '.txt')
         '''
-        pass
+        quick_maps = self._fwhm_map is not None or self._mean_map is not None
+        full_maps = self._fwhm_maps is not None or self._mean_maps is not None
+        if not quick_maps and not full_maps:
+            raise ValueError('There is no processed noise data to correct. '
+                "Run 'gen_quick_noise' or 'gen_full_noise' first.")
+
+        correct_quick = quick_maps and not self._quick_gain_corrected
+        correct_full = full_maps and not self._full_gain_corrected
+        if not correct_quick and not correct_full:
+            raise ValueError('The processed noise data is already gain '
+                'corrected.')
+
+        if gain is None:
+            gain = self.gain
+        if gain is None:
+            raise ValueError("No gain data was supplied, and the 'gain' "
+                'attribute is None.')
+
+        def pixel_gain(values):
+            '''
+            Returns 'gain' sliced to match the pixels of 'values', which may
+            be of the analyzed region or the full detector, with a leading
+            axis for the starting capacitor.
+            '''
+            shape = values.shape[-2:]
+            if gain.shape == shape:
+                return gain
+            if gain.shape == self._full_det_shape and shape == self._det_shape:
+                return gain[self._row_slice, self._col_slice]
+            raise ValueError("The array 'gain' should either have the shape "
+                f"{shape} or {self._full_det_shape}. Instead, an array of "
+                f"shape {gain.shape} was passed.")
+
+        def correct(values, mask_above=None):
+            '''
+            Multiplies the channel-unit 'values' by the pixel gain, masking
+            values over 'mask_above' keV if it is not None.
+            '''
+            if values is None:
+                return None
+            values = np.ma.getdata(values) * pixel_gain(values)
+            if mask_above is not None:
+                values = np.ma.masked_where(values > mask_above, values)
+            return values
+
+        # The masks of the FWHM maps are thresholds in channels, so they
+        # are recomputed from the unmasked data.
+        fwhm_map, mean_map = self._fwhm_map, self._mean_map
+        if correct_quick:
+            fwhm_map = correct(fwhm_map, mask_above=5)
+            mean_map = correct(mean_map)
+            self._quick_gain_corrected = True
+
+        fwhm_maps, mean_maps = self._fwhm_maps, self._mean_maps
+        if correct_full:
+            fwhm_maps = correct(fwhm_maps, mask_above=5)
+            mean_maps = correct(mean_maps)
+            self._full_gain_corrected = True
+
+        self._fwhm_map, self._mean_map = fwhm_map, mean_map
+        self._fwhm_maps, self._mean_maps = fwhm_maps, mean_maps
+        self._gain_corrected = True
+
+        if save_data:
+            quick = [('quick_fwhm_data', data_ext, fwhm_map, np.savetxt),
+                ('quick_mean_data', data_ext, mean_map, np.savetxt),
+                ('quick_count_data', data_ext, self.count_map, np.savetxt),
+                ('quick_fit_data', '.csv', self._quick_fit_data, None)]
+            full = [('full_fwhm_data', '.npy', fwhm_maps, np.save),
+                ('full_mean_data', '.npy', mean_maps, np.save),
+                ('full_count_data', '.npy', self.count_maps, np.save),
+                ('full_fit_data', '.csv', self._full_fit_data, None)]
+
+            for description, ext, data, save in quick + full:
+                if data is None:
+                    continue
+                path = self.construct_path('data', ext=ext, 
+                    save_dir=data_dir, subdir=data_subdir, 
+                    description=description, etc='gain')
+                if save is None:
+                    data.to_csv(path)
+                else:
+                    save(path, np.ma.getdata(data))
 
 
 class Leakage(Experiment):
@@ -3572,7 +5614,10 @@ class GammaFlood(Experiment):
     Public attributes:
         raw_data_path: str
             Path to gamma flood data. Should be a FITS file. Used to access
-            data and to construct new file names.
+            data and to construct new file names. If the data is split 
+            across several files, this is the first of them.
+        raw_data_paths: list of str
+            Paths to all of the FITS files of gamma flood data.
         detector: str
             The detector ID.
         source: a 'nudetect.Source' instance
@@ -3612,6 +5657,16 @@ class GammaFlood(Experiment):
             keV, then the value of spectrum[1, i] is 3. If None, defaults
             to the value stored in self.spectrum.
             (initialized to None)
+        energy_spectrum: EnergySpectrum
+            The accumulated histogram behind 'spectrum', which more events 
+            can be added to (see 'gen_spectrum').
+            (initialized to None)
+        energies: 1D numpy.ndarray
+            The energy in keV of each event in the analyzed region, as 
+            'float32', computed by 'gen_energies' with the gain it was 
+            given. It may be memory-mapped from a file. It is cleared when
+            the raw data is reloaded.
+            (initialized to None)
     '''
     def __init__(self, raw_data_path, detector, source, voltage, temp, 
         data_dir='', plot_dir='', save_dir='', etc=''):
@@ -3620,9 +5675,13 @@ class GammaFlood(Experiment):
         Initializes an instance of the 'GammaFlood' class.
 
         Arguments:
-            raw_data_path: str
+            raw_data_path: str or list of str
                 Path to gamma flood data. Should be a FITS file. Used to access
-                data and to construct new file names.
+                data and to construct new file names. A flood split across 
+                several files (e.g., an interrupted acquisition) can be 
+                passed as a list of their paths. Each file is then processed
+                on its own, and the results are summed; output file names 
+                are constructed from the first file.
             detector: str
                 The detector ID.
             source: a 'nudetect.Source' instance
@@ -3674,9 +5733,20 @@ class GammaFlood(Experiment):
         self.gain = None
         self.gain_dict = {}
         self.spectrum = None
+        self.energy_spectrum = None
+        self.energies = None
+        # The raw data files, region and gain 'energies' were computed 
+        # for, to tell when it is out of date
+        self._energies_key = None
 
         # Set user-supplied attributes
-        self.raw_data_path = raw_data_path
+        if isinstance(raw_data_path, str):
+            self.raw_data_paths = [raw_data_path]
+        else:
+            self.raw_data_paths = list(raw_data_path)
+        if not self.raw_data_paths:
+            raise ValueError("'raw_data_path' must name at least one file.")
+        self.raw_data_path = self.raw_data_paths[0]
         self.detector = detector
         self.source = source
         self.voltage = voltage
@@ -3688,20 +5758,81 @@ class GammaFlood(Experiment):
         self._set_save_dir(data_dir, save_type='data')
 
 
-    def load_raw_data(self):
-        '''Loads raw data from FITS file into attributes of this instance.'''
+    def load_raw_data(self, cache=False, vector_format='dataframe', 
+        compact=False, index=False):
+        '''
+        Loads raw data from FITS file into attributes of this instance.
+
+        Keyword Arguments:
+            cache: bool
+                If True, the decoded columns are cached in (and on later 
+                calls, memory-mapped from) 'self.cache_dir'. The cache 
+                keeps a full copy of the decoded columns on disk; see 
+                'cache_dir'.
+                (default: False)
+            vector_format: str
+                The format of the two dimensional columns in 
+                'self.raw_data_2d', either 'dataframe' or 'numpy'. All 
+                methods accept either. 'numpy' skips wrapping each column 
+                in a DataFrame, so it takes less time and memory. See 
+                'fits_to_df'.
+                (default: 'dataframe')
+            compact: bool
+                If True, the raw data is stored in a single 'EventTable' 
+                with downcast dtypes and bit-packed flags, which both
+                'self.raw_data_1d' and 'self.raw_data_2d' refer to. This 
+                uses less memory per event.
+                (default: False)
+            index: bool
+                If True, the events are indexed by pixel in 
+                'self.pixel_index' (see 'PixelIndex'), so that 
+                'pixel_events' can look up the events at each pixel without
+                scanning all of them. This is worth its one sort over the 
+                events when looking up many single pixels. The 'gen_*' 
+                methods bin all pixels at once and don't use it.
+                (default: False)
+        '''
+        # Events from several files are never combined in memory. Instead,
+        # the 'gen_*' methods stream each file in turn.
+        if len(self.raw_data_paths) > 1:
+            raise ValueError('Raw data split across several files cannot be '
+                + 'loaded. Its events are streamed from each file instead.')
+
+        # Energies computed from previously loaded data are out of date.
+        self.energies = None
+        self._energies_key = None
+
+        cache_dir = self.cache_dir if cache else None
         self.raw_data_1d, self.raw_data_2d = fits_to_df(self.raw_data_path,
-            colnames={'RAWX', 'RAWY', 'PH', 'PH_COM', 'STIM'})
+            colnames={'RAWX', 'RAWY', 'PH', 'PH_COM', 'STIM'}, 
+            cache_dir=cache_dir, vector_format=vector_format)
+        if compact:
+            self._compact_raw_data()
+        self._index_raw_data(index)
+
+
+    def iter_raw_data(self, chunk_size=1000000, 
+        colnames={'RAWX', 'RAWY', 'PH', 'PH_COM', 'STIM'}):
+        '''
+        Yields blocks of at most 'chunk_size' events from the FITS files as
+        dicts of numpy arrays keyed by column name, without loading the 
+        whole files. The files are read one after another. See 
+        'iter_fits_chunks' for details.
+        '''
+        for raw_data_path in self.raw_data_paths:
+            yield from iter_fits_chunks(raw_data_path, colnames, 
+                chunk_size=chunk_size)
 
 
     #
     # Heavy-lifting data analysis methods: 'gen_count_map', 'gen_quick_gain',
-    # and 'gen_spectrum'.
+    # 'gen_spectrum', 'rebin_spectrum', and 'gen_energies'.
     #
 
     def gen_count_map(self, mask_PH=True, mask_STIM=True, 
         mask_sigma_below=None, mask_sigma_above=None, 
-        save_data=True, data_ext='.txt', data_dir='', data_subdir=''):
+        save_data=True, data_ext='.txt', data_dir='', data_subdir='',
+        chunk_size=None, n_jobs=1):
         '''
         Generates event count data for each pixel for raw gamma flood data.
 
@@ -3744,6 +5875,19 @@ class GammaFlood(Experiment):
             data_ext: str
                 The file name extension for the count_map file. 
                 (default: '.txt')
+            chunk_size: int
+                If None, the event data loaded by 'load_raw_data' is used.
+                Otherwise, events are streamed from the FITS file in blocks
+                of at most this many events (see 'iter_raw_data'), so the
+                raw data never has to fit in memory. Events are always 
+                streamed if there are several raw data files, in blocks of 
+                1000000 events if this is None.
+                (default: None)
+            n_jobs: int
+                The number of processes across which to spread the raw data 
+                files, if there are several, or -1 for one per CPU. The 
+                results don't depend on it.
+                (default: 1)
 
         Return:
             count_map: 2D numpy.ndarray
@@ -3757,26 +5901,13 @@ class GammaFlood(Experiment):
                 subdir=data_subdir)
 
 
-        # Masking out non-positive pulse heights and/or artificially 
-        # stimulated events, if requested
-        mask = pd.Series(np.ones_like(self.raw_data_1d.loc[:, 'STIM']))
-
-        if mask_STIM:
-            mask *= self.raw_data_1d.loc[:, 'STIM'] == 0
-        if mask_PH:
-            mask *= self.raw_data_1d.loc[:, 'PH'] > 0
-
-        # Generate the count_map from event data
-        count_map = np.zeros(self._det_shape, dtype='uint32')
-
-        for col in self._col_iter:
-            col_mask = self.raw_data_1d.loc[:, 'RAWX'] == col
-            for row in self._row_iter:
-                row_mask = self.raw_data_1d.loc[:, 'RAWY'] == row
-                maprow = row - self._start_row
-                mapcol = col - self._start_col
-                count_map[maprow, mapcol] = np.sum(np.multiply(
-                    mask, np.multiply(col_mask, row_mask)))
+        # Generate the count_map from event data, folding in each block of
+        # events and masking out non-positive pulse heights and/or 
+        # artificially stimulated events, if requested
+        count_map = self._fold_raw_data(
+            functools.partial(_fold_count_map, region=self._region(), 
+                mask_PH=mask_PH, mask_STIM=mask_STIM), 
+            {'RAWX', 'RAWY', 'PH', 'STIM'}, chunk_size, n_jobs)
 
         # Masking pixels that were turned off, before calculating
         # the rest of the masks (otherwise they'll skew mean and stddev)
@@ -3809,7 +5940,8 @@ class GammaFlood(Experiment):
     def gen_quick_gain(self, energy=None, chan_range=None, gain_estimate=0.014,
         search_width=3000, fit_below=100, fit_above=200, interpolations=2,
         save_plot=True, plot_dir='', plot_subdir='', plot_ext='.pdf', 
-        save_data=True, data_dir='', data_subdir='', data_ext='.txt'):
+        save_data=True, data_dir='', data_subdir='', data_ext='.txt',
+        chunk_size=None, fit_method='levmar', n_jobs=1, sparse=False):
         '''
         Generates gain correction data from the raw gamma flood event data.
         Currently, the fitting done might fail for sources other than Am241.
@@ -3889,6 +6021,32 @@ class GammaFlood(Experiment):
             data_ext: str
                 The file name extension for the gain file. 
                 (default: '.txt')
+            chunk_size: int
+                If None, the event data loaded by 'load_raw_data' is used.
+                Otherwise, events are streamed from the FITS file in blocks
+                of at most this many events (see 'iter_raw_data'), so the
+                raw data never has to fit in memory. Events are always 
+                streamed if there are several raw data files, in blocks of 
+                1000000 events if this is None.
+                (default: None)
+            fit_method: str
+                How the Gaussians are fit to the pixel spectra: 'levmar' 
+                fits them one at a time with astropy's 'LevMarLSQFitter', 
+                and 'batch' fits all of them at once, which is much faster. 
+                'moments' and 'log-parabola' are faster still closed-form 
+                estimates, meant for quick checks of spectra with many 
+                counts. See 'fit_gaussians'.
+                (default: 'levmar')
+            n_jobs: int
+                The number of processes to spread the fits, and the raw 
+                data files if there are several, across, or -1 for one per 
+                CPU. The results don't depend on it. See 'fit_gaussians'.
+                (default: 1)
+            sparse: bool
+                If True, the per-pixel spectra are accumulated sparsely, 
+                which takes less memory when most channels are empty. See 
+                'PixelHistograms'.
+                (default: False)
 
         Return:
             gain: 2D numpy.ndarray
@@ -3916,100 +6074,90 @@ class GammaFlood(Experiment):
         bins = np.arange(1, maxchannel)
         gain = np.zeros(self._det_shape)
 
-        # Iterating through pixels
-        for col in self._col_iter:
-            col_mask = self.raw_data_1d.loc[:, 'RAWX'] == col
-            for row in self._row_iter:
-                row_mask = self.raw_data_1d.loc[:, 'RAWY'] == row
-
-                # Getting pulse height in channels for all events for the 
-                # current pixel. We store this in 'channel' as a numpy.ndarray,
-                # since we don't need the index of the original DataFrame, and
-                # np.histogram should be faster on an ndarray than a DataFrame.
-                channel = self.raw_data_1d.loc[
-                    (col_mask) & (row_mask), 'PH'].values
-
-                # If there were events at this pixel, fit the strongest peak
-                # in the channel spectrum with a Gaussian.
-                if len(channel):
-                    # 'spectrum' contains counts at each channel
-                    spectrum, edges = np.histogram(channel, bins=bins, 
-                        range=(0, maxchannel))
-                    # 'centroid' is the channel with the most counts in the 
-                    # interval between 'chan_low' and 'chan_high'.
-                    centroid = np.argmax(spectrum[chan_low:chan_high]
-                       ) + chan_low
-                    # Excluding funky tails for the fitting process.
-                    fit_channels = np.arange(
-                        centroid - fit_below, centroid + fit_above)
-                    g_init = models.Gaussian1D(amplitude=spectrum[centroid], 
-                        mean=centroid, stddev=75)
-                    fit_g = fitting.LevMarLSQFitter()
-                    g = fit_g(g_init, fit_channels, spectrum[fit_channels])
-
-                    # If we can determine the covariance matrix (which implies
-                    # that the fit succeeded), then calculate this pixel's gain
-                    if fit_g.fit_info['param_cov'] is not None:
-                        maprow = row - self._start_row
-                        mapcol = col - self._start_col
-                        gain[maprow, mapcol] = energy / g.mean
-                        # Plot each pixel's spectrum
-                        if save_plot:
-                            plt.figure()
-
-                            sigma_err = np.diag(fit_g.fit_info['param_cov'])[2]
-                            fwhm_err = 2 * np.sqrt(2 * np.log(2)) * sigma_err
-                            mean_err = np.diag(fit_g.fit_info['param_cov'])[1]
-                            frac_err = np.sqrt(np.square(fwhm_err) 
-                                + np.square(g.fwhm * mean_err / g.mean))\
-                            / g.mean
-                            str_err = str(int(round(
-                                frac_err * energy * 1000)))
-                            str_fwhm = str(int(round(
-                                    energy * 1000 * g.fwhm / g.mean, 0)))
-                            plt.text(
-                                maxchannel * 3 / 5, spectrum[centroid] * 3 / 5,
-                                r'$\mathrm{FWHM}=$' + str_fwhm + r'$\pm$' 
-                                + str_err + ' eV', fontsize=13)
-
-                            plt.hist(
-                                np.multiply(channel, gain[maprow, mapcol]), 
-                                bins=np.multiply(bins, gain[maprow, mapcol]),
-                                range=(0, maxchannel * gain[maprow, mapcol]), 
-                                histtype='stepfilled')
-
-                            plt.plot(
-                                fit_channels * gain[maprow, mapcol], 
-                                g(fit_channels), label='Gaussian fit')
-
-                            plt.ylabel('Counts')
-                            plt.xlabel('Energy')
-                            plt.legend()
-                            plt.tight_layout()
-                            plt.savefig(f'{plot_path}_x{col}_y{row}{plot_ext}')
-                            plt.close()
-
-        del col_mask, row_mask, channel
-
-        # Interpolate gain for pixels where fit was unsuccessful. Do it
-        # multiple times if specified.
-        for _ in range(interpolations):
-            newgain = np.zeros(self._det_shape_buff)
-            # Note that newgain's indices will be shifted over one from 'gain'.
-            newgain[1:self._num_rows + 1,
-                    1:self._num_cols + 1] = gain
-            # 'empty' contains indices at which the fit was unsuccessful
-            empty = np.transpose(np.nonzero(gain == 0.0))
-            # Iterating through pixels with failed fitting.
-            for x in empty:
-                # 'empty_grid' is the 3 x 3 array of gain values around the  
-                # pixel for which the fitting failed.
-                empty_grid = newgain[x[0]:x[0]+3, x[1]:x[1]+3]
-                # If there are any nonzero values in 'empty_grid', set the  
-                # pixel's gain to their mean.
-                if np.count_nonzero(empty_grid):
-                    gain[x[0], x[1]] =\
-                        np.sum(empty_grid) / np.count_nonzero(empty_grid)
+        # 'spectra' holds the channel spectrum of each pixel, binned by
+        # 'bins', and the number of events at each pixel. It is built in a 
+        # single pass, folding in each block of events at once (see 
+        # '_channel_block').
+        spectra = self._fold_raw_data(
+            functools.partial(_fold_channel_spectra, region=self._region(),
+                chan_range=(bins[0], bins[-1]), sparse=sparse), 
+            {'RAWX', 'RAWY', 'PH'}, chunk_size, n_jobs)
+
+        # Fitting the strongest peak in the channel spectrum of each pixel
+        # with events with a Gaussian, all at once. 'centroids' are the 
+        # channels with the most counts in the interval between 'chan_low' 
+        # and 'chan_high', and 'fit_channels' the channels around each 
+        # centroid that are fit, excluding funky tails.
+        maprows, mapcols = np.nonzero(spectra.counts)
+        pixel_spectra = spectra.spectra((maprows, mapcols))
+        centroids = np.argmax(pixel_spectra[:, chan_low:chan_high], axis=1) \
+            + chan_low
+        fit_channels = centroids[:, np.newaxis] \
+            + np.arange(-fit_below, fit_above)
+        params, cov, converged = fit_gaussians(fit_channels, 
+            np.take_along_axis(pixel_spectra, fit_channels, axis=1),
+            amplitude=pixel_spectra[np.arange(len(centroids)), centroids],
+            mean=centroids, stddev=75, method=fit_method, n_jobs=n_jobs)
+
+        # If we can determine the covariance matrix (which implies that the
+        # fit succeeded), then calculate the pixel's gain.
+        gain[maprows[converged], mapcols[converged]] = energy \
+            / params[converged, 1]
+
+        # Plot each successfully fit pixel's spectrum
+        if save_plot:
+            for i in np.flatnonzero(converged):
+                maprow, mapcol = maprows[i], mapcols[i]
+                row = maprow + self._start_row
+                col = mapcol + self._start_col
+
+                # 'spectrum' contains counts at each channel
+                spectrum = pixel_spectra[i]
+                centroid = centroids[i]
+                g = models.Gaussian1D(*params[i])
+
+                plt.figure()
+
+                sigma_err = np.diag(cov[i])[2]
+                fwhm_err = 2 * np.sqrt(2 * np.log(2)) * sigma_err
+                mean_err = np.diag(cov[i])[1]
+                frac_err = np.sqrt(np.square(fwhm_err) 
+                    + np.square(g.fwhm * mean_err / g.mean))\
+                / g.mean
+                str_err = str(int(round(
+                    frac_err * energy * 1000)))
+                str_fwhm = str(int(round(
+                        energy * 1000 * g.fwhm / g.mean, 0)))
+                plt.text(
+                    maxchannel * 3 / 5, spectrum[centroid] * 3 / 5,
+                    r'$\mathrm{FWHM}=$' + str_fwhm + r'$\pm$' 
+                    + str_err + ' eV', fontsize=13)
+
+                # The spectrum is already binned, so each bin is
+                # drawn as a single weighted entry.
+                plt.hist(
+                    np.multiply(bins[:-1], gain[maprow, mapcol]), 
+                    bins=np.multiply(bins, gain[maprow, mapcol]),
+                    weights=spectrum, histtype='stepfilled')
+
+                plt.plot(
+                    fit_channels[i] * gain[maprow, mapcol], 
+                    g(fit_channels[i]), label='Gaussian fit')
+
+                plt.ylabel('Counts')
+                plt.xlabel('Energy')
+                plt.legend()
+                plt.tight_layout()
+                plt.savefig(f'{plot_path}_x{col}_y{row}{plot_ext}')
+                plt.close()
+
+        del spectra
+
+        # Interpolate gain for pixels where fit was unsuccessful, setting 
+        # each to the mean of the nonzero gains around it. Do it multiple 
+        # times if specified.
+        gain = interpolate_empty(gain, empty_value=0.0, 
+            iterations=interpolations)
 
         # Save gain data to an ascii file.
         if save_data:
@@ -4023,7 +6171,9 @@ class GammaFlood(Experiment):
 
 
     def gen_spectrum(self, gain=None, bins=10000, energy_range=(0.01, 120), 
-        save_data=True, data_ext='.txt', data_dir='', data_subdir=''):
+        save_data=True, data_ext='.txt', data_dir='', data_subdir='',
+        chunk_size=None, energy_spectrum=None, n_jobs=1, from_energies=False,
+        fine_bins=None):
         '''
         Applies gain correction to get energy data, and then bins the events
         by energy to obtain a spectrum.
@@ -4038,7 +6188,9 @@ class GammaFlood(Experiment):
                 Number of energy bins
                 (default: 10000)
             energy_range: tuple of numbers
-                The bins will be made between these energies
+                The bins will be made between these energies. It can only 
+                be None if 'bins' is an array of edges (see 
+                'EnergySpectrum').
                 (default: (0.01, 120))
             save_data:
                 If True, 'spectrum' will be saved as an ascii file. Parameters 
@@ -4061,6 +6213,45 @@ class GammaFlood(Experiment):
             data_ext: str
                 The file name extension for the count_map file. 
                 (default: '.txt')
+            chunk_size: int
+                If None, the event data loaded by 'load_raw_data' is used.
+                Otherwise, events are streamed from the FITS file in blocks
+                of at most this many events (see 'iter_raw_data'), so the
+                raw data never has to fit in memory. Events are always 
+                streamed if there are several raw data files, in blocks of 
+                1000000 events if this is None.
+                (default: None)
+            energy_spectrum: EnergySpectrum
+                If not None, the events are added to this spectrum, which 
+                may already hold events from other sources, and its bins 
+                are used instead of 'bins' and 'energy_range'. Otherwise, a 
+                new one is started. Either way, it is stored in the 
+                'energy_spectrum' attribute.
+                (default: None)
+            n_jobs: int
+                The number of processes across which to spread the raw data 
+                files, if there are several, or -1 for one per CPU. The 
+                results don't depend on it.
+                (default: 1)
+            from_energies: bool
+                If True, the events are binned from the energies stored in 
+                'self.energies', which are first computed with 
+                'gen_energies' if they are missing or were computed for 
+                other raw data, or a different gain or detector region. 
+                Binning them again with 
+                other 'bins' or 'energy_range' is then much faster. The 
+                energies are stored as 'float32', so a few events right at 
+                the edge of a bin may fall into the neighboring bin.
+                (default: False)
+            fine_bins: int
+                If not None, the events are binned into this many bins 
+                between 'energy_range' (or into the bins of 
+                'energy_spectrum', if given), which are kept in the 
+                'energy_spectrum' attribute as a master histogram. The 
+                returned spectrum is derived from it by summing adjacent 
+                bins into 'bins', and 'rebin_spectrum' can derive other 
+                spectra from it later (see 'EnergySpectrum.rebin').
+                (default: None)
 
         Return:
             spectrum: 2D numpy.ndarray
@@ -4079,64 +6270,247 @@ class GammaFlood(Experiment):
         if gain is None:
             gain = self.gain
 
-        # Adding a buffer of zeros around the 'gain' array. (Note that the
-        # indices will now be shifted over by one.)
-        gain_buffed = np.zeros(self._det_shape_buff)
-        gain_buffed[1:self._num_rows + 1,
-                    1:self._num_cols + 1] = gain
-        gain = gain_buffed
+        # The bins that the events are counted in
+        if energy_spectrum is not None:
+            event_bins = energy_spectrum.edges
+        elif fine_bins is not None:
+            event_bins = fine_bins
+        else:
+            event_bins = bins
+
+        # Checking the bins, and that 'bins' can be derived from the fine 
+        # bins, before any events are binned, rather than after a full pass
+        # over them.
+        checked_spectrum = energy_spectrum
+        if checked_spectrum is None:
+            checked_spectrum = EnergySpectrum(event_bins, energy_range)
+        if fine_bins is not None:
+            checked_spectrum._rebin_indices(bins, energy_range)
+        del checked_spectrum
+
+        if from_energies:
+            # Binning the stored energies, recomputing them if they are out
+            # of date.
+            if not self._energies_match(gain):
+                self.gen_energies(gain, chunk_size=chunk_size, n_jobs=n_jobs)
+            spectrum = EnergySpectrum(event_bins, energy_range)
+            spectrum.add(self.energies)
+
+        else:
+            # Computing the energies of a block of events at a time (see 
+            # '_energy_block'), and adding them to the counts in each 
+            # energy bin.
+            spectrum = self._fold_raw_data(
+                functools.partial(_fold_energy_spectrum, 
+                    region=self._region(), gain=self._buffer_gain(gain), 
+                    bins=event_bins, 
+                    energy_range=energy_range), 
+                {'RAWX', 'RAWY', 'PH_COM'}, chunk_size, n_jobs)
+
+        if energy_spectrum is None:
+            energy_spectrum = spectrum
+        else:
+            energy_spectrum += spectrum
+
+        # Consolidating the counts and the middle energy of each bin into a 
+        # 2D array 'spectrum'.
+        if fine_bins is None:
+            spectrum = energy_spectrum.to_array()
+        else:
+            spectrum = energy_spectrum.rebin(bins, energy_range).to_array()
+
+        if save_data:
+            np.savetxt(save_path, spectrum)
+
+        self.energy_spectrum = energy_spectrum
+        self.spectrum = spectrum
+
+        return spectrum
+
+
+    def rebin_spectrum(self, bins=1000, energy_range=None):
+        '''
+        Derives a spectrum with coarser bins from the histogram in 
+        'self.energy_spectrum' by summing adjacent bins, without going back
+        to the events (see 'EnergySpectrum.rebin'). This is cheapest with a
+        fine master histogram kept by 'gen_spectrum' (see its 'fine_bins' 
+        argument). The spectrum is stored in 'self.spectrum', so 
+        'plot_spectrum' uses it by default.
+
+        Keyword Arguments:
+            bins: int or array-like
+                The number of bins, or the edges of the bins in keV. Each 
+                edge must line up with an edge of the bins of 
+                'self.energy_spectrum'.
+                (default: 1000)
+            energy_range: tuple of numbers
+                The bins will be made between these energies. If None, the 
+                range of 'self.energy_spectrum' is used.
+                (default: None)
+
+        Return:
+            spectrum: 2D numpy.ndarray
+                The rebinned spectrum, in the same format as returned by 
+                'gen_spectrum'.
+        '''
+        if self.energy_spectrum is None:
+            raise ValueError('No spectrum to rebin. Run gen_spectrum first.')
+
+        spectrum = self.energy_spectrum.rebin(bins, energy_range).to_array()
+        self.spectrum = spectrum
+
+        return spectrum
+
+
+    def gen_energies(self, gain=None, chunk_size=None, n_jobs=1, 
+        save_path=None):
+        '''
+        Computes the energy of each event in the analyzed region once, so 
+        that spectra with different bins can be made from them without 
+        going back to the raw data (see 'gen_spectrum'). The energies are 
+        stored in 'self.energies' as 'float32', which takes 4 bytes per 
+        event.
+
+        Keyword Arguments:
+            gain: 2D numpy.ndarray
+                A 32 x 32 array of floats. Each entry represents its  
+                respective pixel's gain, where channels * gain = energy. If 
+                None, defaults to the array in 'self.gain'.
+                (default: None)
+            chunk_size: int
+                If None, the event data loaded by 'load_raw_data' is used.
+                Otherwise, events are streamed from the FITS file in blocks
+                of at most this many events (see 'iter_raw_data'), so the
+                raw data never has to fit in memory. Events are always 
+                streamed if there are several raw data files, in blocks of 
+                1000000 events if this is None.
+                (default: None)
+            n_jobs: int
+                The number of processes across which to spread the raw data 
+                files, if there are several, or -1 for one per CPU. The 
+                results don't depend on it.
+                (default: 1)
+            save_path: str
+                If not None, the energies are saved to this path in '.npy'
+                format, with no extension added, and 'self.energies' is 
+                memory-mapped from it rather than kept in memory.
+                (default: None)
+
+        Return:
+            energies: 1D numpy.ndarray
+                The energy in keV of each event in the analyzed region, in 
+                the order they were read from the raw data.
+        '''
+        # If no gain is passed, take it from the GammaFlood instance.
+        if gain is None:
+            gain = self.gain
 
         # PH_COM is a list of length 9 corresponding to the charge in pixels 
         # surrounding the event.
         #
         # PH_COM -> gain correct -> sum positive elements in the 3x3 array -> 
         # event in energy units
+        blocks = self._fold_raw_data(
+            functools.partial(_fold_energies, region=self._region(),
+                gain=self._buffer_gain(gain)), 
+            {'RAWX', 'RAWY', 'PH_COM'}, chunk_size, n_jobs)
+        energies = np.concatenate(blocks) if blocks \
+            else np.empty(0, dtype=np.float32)
+        del blocks
+
+        # 'open_memmap' writes to 'save_path' as given, whereas 'np.save' 
+        # would append '.npy' to it if it were missing.
+        if save_path is not None:
+            saved = np.lib.format.open_memmap(save_path, mode='w+', 
+                dtype=energies.dtype, shape=energies.shape)
+            saved[:] = energies
+            saved.flush()
+            del saved
+            energies = np.lib.format.open_memmap(save_path, mode='r')
+
+        self.energies = energies
+        self._energies_key = (tuple(self.raw_data_paths), 
+            self._region(), np.array(gain, dtype=float))
+
+        return energies
+
+
+    def _energies_match(self, gain):
+        '''
+        Returns True if 'self.energies' was computed by 'gen_energies' with
+        the gains 'gain' for the current raw data files and detector region,
+        so that it is up to date.
+        '''
+        if self.energies is None or self._energies_key is None:
+            return False
 
-        ph_com = self.raw_data_2d['PH_COM']
-
-        # 'energies' is a list of event energies in keV.
-        energies = []
-        # iterating through pixels in the selected region
-        for row in self._row_iter:
-            row_mask = self.raw_data_1d.loc[:, 'RAWY'] == row
-            for col in self._col_iter:
-                col_mask = self.raw_data_1d.loc[:, 'RAWX'] == col
-
-                maprow = row - self._start_row
-                mapcol = col - self._start_col
-                # Getting PH_COM values ('pulses') of all events at current 
-                # pixel and storing as an ndarray in 'pulses'.
-                pulses = ph_com.loc[(row_mask) & (col_mask)].values
-                # The gain for the 3 x 3 grid around this pixel
-                gain_grid = gain[maprow:maprow + 3, mapcol:mapcol + 3]
-                # iterating through the PH_COM values for this pixel
-                for pulse in pulses:
-                    # Append the sum of positive energies in the 
-                    # pulse grid to 'energies'
-                    pulse_grid = pulse.reshape((3, 3))
-                    mask = (pulse_grid > 0).astype(int)
-                    energies.append(np.sum(np.multiply(
-                        np.multiply(mask, pulse_grid), gain_grid)))
-
-        # Binning by energy
-        counts, edges = np.histogram(energies, bins=bins, range=energy_range)
-        del energies
-
-        # Getting the midpoint of the edges of each bin, representing an energy
-        # in keV.
-        midpoints = (edges[:-1] + edges[1:]) / 2
-
-        # Consolidating 'counts' and 'midpoints' into a 2D array 'spectrum'.
-        spectrum = np.empty((2, counts.size))
-        spectrum[0, :] = counts
-        spectrum[1, :] = midpoints
+        paths, region, energies_gain = self._energies_key
+        return paths == tuple(self.raw_data_paths) \
+            and region == self._region() \
+            and np.array_equal(np.array(gain, dtype=float), energies_gain,
+                equal_nan=True)
 
-        if save_data:
-            np.savetxt(save_path, spectrum)
 
-        self.spectrum = spectrum
+    def _buffer_gain(self, gain):
+        '''
+        Returns 'gain' with a buffer of zeros around it, as '_energy_block'
+        expects. (Note that the indices are shifted over by one.)
+        '''
+        gain_buffed = np.zeros(self._det_shape_buff)
+        gain_buffed[1:self._num_rows + 1,
+                    1:self._num_cols + 1] = gain
+        return gain_buffed
 
-        return spectrum
+
+    #
+    # Helper method for processing blocks of events: '_fold_raw_data'. The
+    # folds it applies are module-level functions (e.g., '_fold_count_map').
+    #
+
+    def _fold_raw_data(self, fold, colnames, chunk_size=None, n_jobs=1):
+        '''
+        Returns 'fold' applied to the blocks of the columns 'colnames' of the
+        raw data: the data loaded by 'load_raw_data' if 'chunk_size' is 
+        None, or otherwise the blocks of at most 'chunk_size' events 
+        streamed from the FITS file. 'fold' takes an iterable of blocks and
+        returns an accumulator of them, like a count map or a histogram, 
+        that can be summed with '+='.
+
+        If there are several raw data files, each file is streamed and 
+        folded on its own, in up to 'n_jobs' processes at once (or one per
+        CPU, if -1), and their accumulators are summed in the order of the 
+        files. Events from different files are never combined. 'fold' is 
+        then sent to each worker process, so it should be a module-level 
+        function (or a 'functools.partial' of one) holding only the state 
+        it needs, not a bound method, which would send the whole instance 
+        along with its raw data.
+        '''
+        if len(self.raw_data_paths) == 1:
+            if chunk_size is None:
+                return fold(self._raw_data_blocks(colnames))
+            return fold(self.iter_raw_data(chunk_size, colnames=colnames))
+
+        if chunk_size is None:
+            chunk_size = 1000000
+        if n_jobs == -1:
+            n_jobs = os.cpu_count()
+        n_jobs = min(n_jobs, len(self.raw_data_paths))
+
+        args = (self.raw_data_paths, itertools.repeat(colnames), 
+            itertools.repeat(chunk_size))
+        if n_jobs > 1:
+            with concurrent.futures.ProcessPoolExecutor(n_jobs) as executor:
+                results = list(executor.map(_fold_fits_chunks, 
+                    itertools.repeat(fold), *args))
+        else:
+            results = list(map(_fold_fits_chunks, itertools.repeat(fold), 
+                *args))
+
+        total = results[0]
+        for result in results[1:]:
+            total += result
+
+        return total
 
 
     #